@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from predictor import PredictorStatusError
+
+logger = logging.getLogger(__name__)
+
+# Status codes meaning "this server has no batch endpoint" rather than "this batch failed"
+BATCH_UNSUPPORTED_STATUSES = (404, 405, 422, 501)
+
+
+# 📦 Coalesces predictions from all sessions into batched predictor calls
+
+class PredictionBatcher:
+    def __init__(self, predictor, window: float = 0.015, max_batch: int = 64):
+        self.predictor = predictor
+        self.window = window
+        self.max_batch = max_batch
+        self.batch_supported = True
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    async def predict(self, inputs: dict) -> dict:
+        if not self.batch_supported:
+            # No batch endpoint to coalesce into, so waiting out the window would only add latency
+            return await self.predictor.predict(inputs)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((inputs, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: list):
+        if len(batch) > 1 and self.batch_supported:
+            try:
+                results = await self.predictor.predict_batch([inputs for inputs, _ in batch])
+            except PredictorStatusError as err:
+                if err.status_code not in BATCH_UNSUPPORTED_STATUSES:
+                    self._fail(batch, err)
+                    return
+                logger.info("Predictor has no batch endpoint (HTTP %s); sending predictions individually",
+                            err.status_code)
+                self.batch_supported = False
+            except Exception as err:
+                self._fail(batch, err)
+                return
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+                return
+
+        await asyncio.gather(*(self._send_one(inputs, future) for inputs, future in batch))
+
+    async def _send_one(self, inputs: dict, future: asyncio.Future):
+        try:
+            result = await self.predictor.predict(inputs)
+        except Exception as err:
+            if not future.done():
+                future.set_exception(err)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch: list, err: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(err)
@@ -0,0 +1,64 @@
+# Bulk file predictions: rows/sec and peak memory for a generated 100k-row CSV.
+# Run from the repo root: python -m benchmarks.bench_bulk [--in-process]
+import argparse
+import asyncio
+import csv
+import os
+import random
+import resource
+import tempfile
+import tracemalloc
+
+from benchmarks.stubs import fake_predictions, fixed_latency, make_predictor_app, serve
+from bulk import predict_file
+from predictor import PACK_FIELDS, PredictorClient
+
+
+def write_input(path: str, rows: int, seed: int = 0):
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(PACK_FIELDS)
+        for _ in range(rows):
+            writer.writerow([rng.randint(600, 2000), rng.randint(800, 2000), rng.randint(100, 1600),
+                             rng.randint(20, 120), rng.choice([350, 400, 600, 800])])
+
+
+async def in_process_predict(inputs):
+    await asyncio.sleep(0)
+    return {"predictions": fake_predictions(inputs)}
+
+
+async def run(args, in_path, out_path, predict):
+    tracemalloc.start()
+    stats = await predict_file(in_path, out_path, predict, concurrency=args.concurrency)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"rows={stats['rows']} failed={stats['failed']} seconds={stats['seconds']:.2f} "
+          f"throughput={stats['rows'] / stats['seconds']:.0f} rows/s "
+          f"python_peak={peak / 2**20:.1f} MiB max_rss={resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        in_path, out_path = os.path.join(tmp, "packs.csv"), os.path.join(tmp, "results.csv")
+        write_input(in_path, args.rows)
+        if args.in_process:
+            await run(args, in_path, out_path, in_process_predict)
+            return
+        with serve(make_predictor_app(latency=fixed_latency(args.latency))) as base:
+            predictor = PredictorClient(f"{base}/predict/", max_connections=args.concurrency,
+                                        max_keepalive_connections=args.concurrency)
+            try:
+                await run(args, in_path, out_path, predictor.predict)
+            finally:
+                await predictor.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub service time in seconds")
+    parser.add_argument("--in-process", action="store_true", help="skip HTTP and measure the pipeline alone")
+    asyncio.run(main(parser.parse_args()))
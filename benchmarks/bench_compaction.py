@@ -0,0 +1,123 @@
+# Prompt tokens per DeepSeek request with and without history compaction, replayed over a
+# conversation corpus. A corpus is JSONL, one conversation per line: {"messages": [{"role", "content"}, ...]}.
+# Without --corpus a deterministic synthetic corpus of prediction + follow-up sessions is used.
+# Run from the repo root: python -m benchmarks.bench_compaction [--corpus conversations.jsonl]
+import argparse
+import asyncio
+import json
+import random
+
+from benchmarks.stubs import fake_predictions, percentile
+from history import ChatHistory, analysis_prompt, extractive_summary, load_token_counter
+
+QUESTIONS = [
+    "What is power density and why does it matter for this pack?",
+    "Why is this cell taller than the one before?",
+    "Would LFP chemistry change these dimensions?",
+    "How many cells in series do I need for this voltage?",
+    "Can you compare this design with the previous one?",
+    "What cooling strategy fits this cell format?",
+    "能否解释一下这个电芯尺寸的原因？",
+]
+
+ANALYSIS_SENTENCES = [
+    "The predicted cell is a prismatic format that balances volumetric efficiency against thermal paths.",
+    "With a nominal cell voltage near 3.2 V, the pack needs roughly {series} cells in series.",
+    "The energy target of {energy:g} kWh implies about {capacity:.0f} Ah per string.",
+    "**Power Density** of {density:.1f} Wh/kg is typical for current LFP designs.",
+    "Taller cells reduce the number of busbar joints but lengthen the heat path to the cooling plate.",
+    "Consider a cooling plate under the cells and 2–3 mm gaps for swelling.",
+    "`E = V × Ah` gives a quick check of the pack capacity against the requested energy.",
+]
+
+
+def synthetic_corpus(conversations: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(conversations):
+        messages = []
+        for _ in range(rng.randint(2, 5)):
+            pack = {"Length_pack": rng.randint(800, 2000), "Width_pack": rng.randint(800, 2000),
+                    "Height_pack": rng.randint(100, 1600), "Energy": rng.randint(30, 120),
+                    "Total_Voltage": rng.choice([400, 800])}
+            predictions = fake_predictions(pack)
+            facts = {"series": pack["Total_Voltage"] / 3.2, "energy": pack["Energy"],
+                     "capacity": pack["Energy"] * 1000 / pack["Total_Voltage"], "density": predictions["Power_density"]}
+            messages.append({"role": "user", "content": analysis_prompt(pack, predictions), "prediction": True})
+            messages.append({"role": "assistant", "content": " ".join(
+                rng.choice(ANALYSIS_SENTENCES).format(**facts) for _ in range(rng.randint(12, 25)))})
+            for _ in range(rng.randint(1, 4)):
+                messages.append({"role": "user", "content": rng.choice(QUESTIONS)})
+                messages.append({"role": "assistant", "content": " ".join(
+                    rng.choice(ANALYSIS_SENTENCES).format(**facts) for _ in range(rng.randint(4, 12)))})
+        yield messages
+
+
+def load_corpus(path: str):
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)["messages"]
+
+
+def shared_prefix_tokens(history: ChatHistory, previous: list, current: list) -> int:
+    # Tokens at the start of this request that repeat the previous request byte for byte,
+    # i.e. what DeepSeek's context cache can serve
+    shared = 0
+    for before, after in zip(previous, current):
+        if before != after:
+            break
+        shared += history._count(after["content"])
+    return shared
+
+
+async def replay(corpus, make_history):
+    # Records the prompt size of every request the app would send (one per user message)
+    prompt_tokens, cacheable = [], 0
+    for i, messages in enumerate(corpus):
+        history = make_history(f"bench-{i}")
+        previous = []
+        for message in messages:
+            if message["role"] == "user":
+                history.append("user", message["content"], prediction=message.get("prediction", False))
+                await history.compact(extractive_summary)
+                prompt_tokens.append(history.tokens)
+                current = [dict(m) for m in history.messages()]
+                cacheable += shared_prefix_tokens(history, previous, current)
+                previous = current
+            else:
+                history.append(message["role"], message["content"])
+        history.close()
+    return prompt_tokens, cacheable
+
+
+def report(label: str, result):
+    tokens, cacheable = result
+    print(f"{label:<28} requests={len(tokens):<5} mean={sum(tokens) / len(tokens):7.0f}  "
+          f"p50={percentile(tokens, 50):6.0f}  p90={percentile(tokens, 90):6.0f}  "
+          f"p99={percentile(tokens, 99):6.0f}  max={max(tokens):6.0f}  total={sum(tokens)}  "
+          f"shared_prefix={cacheable / sum(tokens) * 100:4.1f}%")
+
+
+async def main(args):
+    count_tokens = load_token_counter(args.tokenizer)
+    corpus = list(load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.conversations))
+    before = await replay(corpus, lambda sid: ChatHistory(sid, max_messages=args.max_messages,
+                                                          max_tokens=args.max_tokens, count_tokens=count_tokens))
+    after = await replay(corpus, lambda sid: ChatHistory(sid, max_messages=args.max_messages,
+                                                         max_tokens=args.max_tokens, count_tokens=count_tokens,
+                                                         compact_tokens=args.compact_tokens,
+                                                         keep_recent=args.keep_recent))
+    report("before: eviction only", before)
+    report(f"after: compact at {args.compact_tokens}", after)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--tokenizer", help="tokenizer.json to count with (default: tiktoken or byte estimate)")
+    parser.add_argument("--max-messages", type=int, default=20)
+    parser.add_argument("--max-tokens", type=int, default=6000)
+    parser.add_argument("--compact-tokens", type=int, default=2500)
+    parser.add_argument("--keep-recent", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,66 @@
+# Hedged predictor requests against a stub with heavy-tailed (lognormal) latency.
+# Run from the repo root: python -m benchmarks.bench_hedging
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.stubs import SAMPLE_PACK, lognormal_latency, make_predictor_app, serve, summarize
+from predictor import PredictorClient
+from resilience import HedgePolicy
+
+
+def counted(client: PredictorClient) -> dict:
+    # Count requests actually sent, hedges included
+    sent = {"requests": 0}
+    original = client._post_once
+
+    async def post_once(url, payload):
+        sent["requests"] += 1
+        return await original(url, payload)
+
+    client._post_once = post_once
+    return sent
+
+
+async def run(client: PredictorClient, requests: int, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with slots:
+            start = time.perf_counter()
+            await client.predict(SAMPLE_PACK)
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    samples = await asyncio.gather(*(one() for _ in range(requests)))
+    return samples, time.perf_counter() - start
+
+
+async def main(args):
+    random.seed(args.seed)
+    latency = lognormal_latency(args.median, args.sigma)
+    with serve(make_predictor_app(latency=latency)) as base:
+        for label, hedge in (("no hedging", None),
+                             (f"hedge at p{args.percentile:g}", HedgePolicy(percentile=args.percentile,
+                                                                             max_extra_ratio=args.max_ratio))):
+            client = PredictorClient(f"{base}/predict/", hedge=hedge, max_connections=2 * args.concurrency)
+            sent = counted(client)
+            try:
+                samples, wall = await run(client, args.requests, args.concurrency)
+            finally:
+                await client.aclose()
+            extra = sent["requests"] / args.requests - 1
+            print(f"{summarize(label, samples, wall)}  extra_load={extra * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--median", type=float, default=0.02, help="median stub latency in seconds")
+    parser.add_argument("--sigma", type=float, default=1.2, help="lognormal shape; larger means heavier tail")
+    parser.add_argument("--percentile", type=float, default=95)
+    parser.add_argument("--max-ratio", type=float, default=0.1, help="cap on hedges as a share of requests")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
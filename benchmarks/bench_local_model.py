@@ -0,0 +1,63 @@
+# Local inference latency: single predictions and batched forward passes.
+# Uses random weights unless --weights points at an exported model.
+# Run from the repo root: python -m benchmarks.bench_local_model
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.stubs import SAMPLE_PACK
+from local_model import LocalPredictor, save_weights
+
+
+def random_weights(path: str, hidden: int, depth: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    sizes = [5] + [hidden] * depth + [4]
+    layers = [(rng.normal(0, 1 / np.sqrt(a), (a, b)), np.zeros(b)) for a, b in zip(sizes, sizes[1:])]
+    save_weights(path, layers, input_mean=[1200, 1400, 800, 70, 500], input_std=[400, 350, 400, 30, 150],
+                 output_mean=[200, 50, 100, 180], output_std=[80, 20, 40, 30])
+
+
+async def time_single(model: LocalPredictor, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        await model.predict(SAMPLE_PACK)
+    return (time.perf_counter() - start) / n
+
+
+def time_batch(model: LocalPredictor, size: int, repeat: int) -> float:
+    packs = np.random.default_rng(1).uniform([600, 800, 100, 20, 350], [2000, 2000, 1600, 120, 800], (size, 5))
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict_array(packs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.weights
+        if path is None:
+            path = os.path.join(tmp, "random.npz")
+            random_weights(path, args.hidden, args.depth)
+        model = LocalPredictor(path)
+        single = asyncio.run(time_single(model, args.single))
+        print(f"single predict(): {single * 1e6:8.2f} us/call")
+        for size in args.batch_sizes:
+            seconds = time_batch(model, size, args.repeat)
+            print(f"batch {size:>7}: {seconds * 1e3:9.3f} ms  ({seconds / size * 1e9:8.1f} ns/pack)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights")
+    parser.add_argument("--hidden", type=int, default=64)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--single", type=int, default=10000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 64, 1024, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    main(parser.parse_args())
@@ -0,0 +1,107 @@
+# Inverse design: surrogate-guided /optimize against grid and random search on the same black box.
+# The black box is the local model with random weights (unless --weights) behind a simulated
+# round-trip cost, so the wall times reflect how many predictor calls and predictions each method spends.
+# Each call answers a whole round, as a predictor with a batch endpoint does; without one every prediction
+# is its own request, and the preds column is the request count to compare.
+# Run from the repo root: python -m benchmarks.bench_optimize
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_local_model import random_weights
+from local_model import LocalPredictor
+from optimize import Problem, optimize, outputs
+from sweep import evaluate_local, grid, latin_hypercube, parse_sweep
+
+SPACE = "length=800:2000:{s} width=600:1800:{s} height=100:1600:{s} energy=40:100:{s} voltage=400"
+
+
+class BlackBox:
+    # Local model with a per-call and per-prediction delay; counts what each method spends
+    def __init__(self, model, call_latency: float, point_latency: float):
+        self.model = model
+        self.call_latency = call_latency
+        self.point_latency = point_latency
+        self.calls = self.points = 0
+
+    async def __call__(self, points: np.ndarray) -> np.ndarray:
+        self.calls += 1
+        self.points += len(points)
+        await asyncio.sleep(self.call_latency + self.point_latency * len(points))
+        return evaluate_local(self.model, points)
+
+
+def best_feasible(problem: Problem, predictions: np.ndarray) -> float:
+    objective, feasible = problem.score(outputs(predictions))
+    return float(objective[feasible].max()) if feasible.any() else float("nan")
+
+
+async def exhaustive(problem: Problem, box: BlackBox, points: np.ndarray, batch_size: int) -> float:
+    predictions = [await box(points[i:i + batch_size]) for i in range(0, len(points), batch_size)]
+    return best_feasible(problem, np.concatenate(predictions))
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.weights
+        if path is None:
+            path = os.path.join(tmp, "random.npz")
+            random_weights(path, hidden=64, depth=3)
+        model = LocalPredictor(path)
+
+    problem = Problem.parse(f"{SPACE.format(s=2)} {args.goal}", args.budget)
+    rows = []
+
+    async def timed(label: str, run):
+        box = BlackBox(model, args.call_latency, args.point_latency)
+        start = time.perf_counter()
+        best = await run(box)
+        rows.append((label, box.points, box.calls, time.perf_counter() - start, best))
+
+    for steps in args.grid_steps:
+        points = grid(parse_sweep(SPACE.format(s=steps))["ranges"])
+        await timed(f"grid {steps}^4", lambda box: exhaustive(problem, box, points, args.batch_size))
+
+    for seed in range(args.seeds):
+        sample = latin_hypercube(parse_sweep(SPACE.format(s=2))["ranges"], args.budget, seed + 1)
+        await timed(f"random (seed {seed})", lambda box: exhaustive(problem, box, sample, args.batch))
+
+        async def surrogate(box):
+            result = await optimize(problem, box, batch=args.batch, seed=seed)
+            if result["best_inputs"] is None:
+                return float("nan")
+            value = result["best_outputs"][problem.objective]
+            return value if problem.maximize else -value
+
+        await timed(f"surrogate (seed {seed})", surrogate)
+
+    # Reference optimum: a dense local sample, free of any simulated cost, or the best any method found
+    dense = latin_hypercube(parse_sweep(SPACE.format(s=2))["ranges"], args.reference_samples, 0)
+    reference = np.nanmax([best_feasible(problem, evaluate_local(model, dense)), *(row[-1] for row in rows)])
+    print(f"goal: {problem.describe()}  (best known {reference if problem.maximize else -reference:.3f})")
+    print(f"  {'method':<24} {'preds':>7} {'calls':>6} {'wall':>10} {'best':>10} {'gap':>9}")
+    for label, points, calls, wall, best in rows:
+        # Scores are maximized internally; show the objective itself
+        gap = (reference - best) / abs(reference) * 100
+        value = best if problem.maximize else -best
+        print(f"  {label:<24} {points:>7,} {calls:>6,} {wall:>8.2f} s {value:>10.3f} {gap:>7.2f} %")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights")
+    parser.add_argument("--goal", default="minimize=cell_volume power_density>=190",
+                        help="objective and constraints, as typed after /optimize")
+    parser.add_argument("--budget", type=int, default=60, help="predictions for random and surrogate search")
+    parser.add_argument("--batch", type=int, default=4, help="predictions per surrogate round")
+    parser.add_argument("--seeds", type=int, default=3)
+    parser.add_argument("--grid-steps", type=int, nargs="+", default=[3, 5, 8])
+    parser.add_argument("--batch-size", type=int, default=256, help="grid predictions per call")
+    parser.add_argument("--call-latency", type=float, default=0.05, help="simulated round trip per call")
+    parser.add_argument("--point-latency", type=float, default=0.002, help="simulated cost per prediction")
+    parser.add_argument("--reference-samples", type=int, default=200_000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+# parse_input: original multi-scan parser vs the precompiled per-field parser, as a pytest-benchmark suite.
+# Checks both return identical results on every case and a fuzzed corpus, then times each input form.
+# Needs pytest-benchmark for the timings (pip install pytest-benchmark); the equivalence checks run without it.
+# Run from the repo root: python -m pytest benchmarks/bench_parse_input.py --benchmark-group-by=param:case
+import importlib.util
+import random
+import re
+
+import pytest
+
+from parsing import parse_input
+
+
+def parse_input_original(text: str):
+    clean_text = re.sub(r"[，、;|]", ",", text.lower())
+
+    field_patterns = {
+        "Length_pack": r"(length|long)\D*(\d+(\.\d+)?)",
+        "Width_pack": r"(width|wide)\D*(\d+(\.\d+)?)",
+        "Height_pack": r"(height|tall)\D*(\d+(\.\d+)?)",
+        "Energy": r"(energy|capacity)\D*(\d+(\.\d+)?)",
+        "Total_Voltage": r"(voltage)\D*(\d+(\.\d+)?)"
+    }
+
+    extracted = {}
+    for key, pattern in field_patterns.items():
+        match = re.search(pattern, clean_text)
+        if match:
+            extracted[key] = float(match.group(2))
+
+    if len(extracted) == 5:
+        return extracted
+
+    try:
+        numbers = [float(x.strip()) for x in clean_text.split(",") if x.strip()]
+        if len(numbers) == 5:
+            return {
+                "Length_pack": numbers[0],
+                "Width_pack": numbers[1],
+                "Height_pack": numbers[2],
+                "Energy": numbers[3],
+                "Total_Voltage": numbers[4]
+            }
+    except ValueError:
+        pass
+
+    return None
+
+
+CASES = {
+    "keyword": "Length 1000 mm, width 1600mm, height: 1500, energy 60 kWh, voltage 400V",
+    "bare_csv": "1000, 1600, 1500, 60, 400",
+    "chinese_punct": "1000，1600、1500;60|400",
+    "overlapping": "tallong 5, wide 3, energy 2, voltage 1",
+    "garbage": "what is the difference between LFP and NMC chemistry for a long range pack?",
+    # A typical follow-up: several sentences of prose that mention a few keywords but never all five
+    "long_prose": " ".join([
+        "Thanks for the prediction. Could you explain why the cell height came out so much taller than",
+        "the width, and whether a longer pack with the same energy would change the power density?",
+        "We are also considering a higher voltage architecture for the next revision of this design,",
+        "so any guidance on how that trades off against cooling and packaging would be appreciated.",
+    ] * 4),
+}
+
+FUZZ_WORDS = ["length", "long", "width", "wide", "height", "tall", "energy", "capacity", "voltage",
+              "Length", "VOLTAGE", "mm", "kwh", "v", "is", "the", "wavelength", "longer",
+              # Keywords sharing letters, so one match overlaps the start of the next
+              "tallong", "lengtheight", "widenergy", "talllength", "capacitywide", "heightall", "longwidth"]
+FUZZ_PUNCT = [",", "，", "、", ";", "|", " ", ".", ":", "=", "-"]
+FUZZ_CASES = 50000
+
+PARSERS = {"original": parse_input_original, "precompiled": parse_input}
+
+
+def fuzz_case(rng: random.Random) -> str:
+    parts = []
+    for _ in range(rng.randint(0, 14)):
+        roll = rng.random()
+        if roll < 0.4:
+            parts.append(rng.choice(FUZZ_WORDS))
+        elif roll < 0.8:
+            parts.append(rng.choice(["1000", "1600.5", "60", "400", "3.", ".5", "1.2.3", "٣", "1e3", "0"]))
+        else:
+            parts.append(rng.choice(FUZZ_PUNCT))
+        parts.append(rng.choice(FUZZ_PUNCT + [""]))
+    return "".join(parts)
+
+
+def assert_same(text: str):
+    expected, actual = parse_input_original(text), parse_input(text)
+    assert expected == actual, f"parse_input mismatch for {text!r}: {expected} != {actual}"
+    # Callers build the predictor payload from the dict, so the field order must match too
+    assert expected is None or list(expected) == list(actual)
+
+
+@pytest.mark.parametrize("case", CASES)
+def test_equivalent(case):
+    assert_same(CASES[case])
+
+
+def test_equivalent_fuzz():
+    rng = random.Random(0)
+    for _ in range(FUZZ_CASES):
+        assert_same(fuzz_case(rng))
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pytest_benchmark") is None, reason="needs pytest-benchmark")
+@pytest.mark.parametrize("parser", PARSERS)
+@pytest.mark.parametrize("case", CASES)
+def test_parse_input(benchmark, case, parser):
+    benchmark(PARSERS[parser], CASES[case])
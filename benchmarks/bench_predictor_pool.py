@@ -0,0 +1,58 @@
+# Compares one-client-per-message (old) against the shared pooled client (new).
+# Run from the repo root: python -m benchmarks.bench_predictor_pool
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.stubs import SAMPLE_PACK, fixed_latency, make_predictor_app, serve, summarize
+from predictor import create_http_client
+
+
+async def per_message_client(url):
+    async with httpx.AsyncClient(timeout=30.0) as client_http:
+        start = time.perf_counter()
+        res = await client_http.post(url, json=SAMPLE_PACK)
+        res.json()
+        return time.perf_counter() - start
+
+
+def pooled_client(client_http):
+    async def call(url):
+        start = time.perf_counter()
+        res = await client_http.post(url, json=SAMPLE_PACK)
+        res.json()
+        return time.perf_counter() - start
+    return call
+
+
+async def run_sequential(call, url, n):
+    return [await call(url) for _ in range(n)]
+
+
+async def run_concurrent(call, url, n):
+    return await asyncio.gather(*(call(url) for _ in range(n)))
+
+
+async def main(args):
+    with serve(make_predictor_app(latency=fixed_latency(args.latency))) as base:
+        url = f"{base}/predict/"
+        shared = create_http_client(max_connections=args.max_connections)
+        try:
+            for mode, runner in (("sequential", run_sequential), ("concurrent", run_concurrent)):
+                for label, call in (("old: client per message", per_message_client),
+                                    ("new: shared pool", pooled_client(shared))):
+                    start = time.perf_counter()
+                    samples = await runner(call, url, args.requests)
+                    print(summarize(f"{mode:<10} {label}", samples, time.perf_counter() - start))
+        finally:
+            await shared.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.005, help="stub service time in seconds")
+    parser.add_argument("--max-connections", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
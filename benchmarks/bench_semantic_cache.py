@@ -0,0 +1,73 @@
+# Follow-up latency with the semantic cache: miss (lookup + streamed DeepSeek answer) vs hit (lookup only).
+# Also reports how many paraphrases hit, and how many different questions wrongly hit, at the threshold.
+# Run from the repo root: python -m benchmarks.bench_semantic_cache
+import argparse
+import asyncio
+import time
+
+from benchmarks.stubs import fixed_latency, make_openai_app, serve, summarize
+from deepseek import DeepSeekChat
+from semantic_cache import SemanticCache, load_embedder
+
+CONTEXT = "Pack: 1200 x 800 x 150 mm, 75 kWh, 400 V. Predicted cell: 300 x 100 x 20 mm, 250 Wh/kg."
+QUESTIONS = [
+    ("What is power density?", "what is the power density?"),
+    ("Why is the cell so tall?", "why is the cell this tall"),
+    ("How can I increase the energy of the pack?", "How do I increase the pack energy?"),
+    ("Which chemistry fits this pack?", "which cell chemistry suits this pack?"),
+    ("Is 400 V a good total voltage?", "is a 400V total voltage good?"),
+]
+# Close in wording to the cached questions but asking something else: these must all miss
+DIFFERENT = [
+    "What is energy density?",
+    "Why is the cell so wide?",
+    "How can I decrease the energy of the pack?",
+    "Which chemistry is safest?",
+    "Is 800 V a good total voltage?",
+    "Why is the power density so low?",
+]
+REPLY = " ".join(["token"] * 200)
+
+
+async def main(args):
+    cache = SemanticCache(load_embedder(args.model), threshold=args.threshold, max_entries=args.size)
+    app = make_openai_app(latency=fixed_latency(args.first_token), reply=REPLY, token_delay=args.token_delay)
+    with serve(app) as base:
+        chat = DeepSeekChat(api_key="stub", base_url=f"{base}/v1")
+        try:
+            misses, hits, paraphrase_hits = [], [], 0
+            for question, paraphrase in QUESTIONS:
+                start = time.perf_counter()
+                answer, vector = await cache.lookup(question, CONTEXT)
+                reply = "".join([token async for token in chat.stream([{"role": "user", "content": question}])])
+                await cache.store(question, CONTEXT, reply, vector)
+                misses.append(time.perf_counter() - start)
+
+                for _ in range(args.repeats):
+                    start = time.perf_counter()
+                    answer, _vector = await cache.lookup(paraphrase, CONTEXT)
+                    hits.append(time.perf_counter() - start)
+                paraphrase_hits += answer is not None
+
+            false_hits = 0
+            for question in DIFFERENT:
+                answer, _vector = await cache.lookup(question, CONTEXT)
+                false_hits += answer is not None
+
+            print(summarize("miss: lookup + DeepSeek stream", misses, sum(misses)))
+            print(summarize("hit: lookup only", hits, sum(hits)))
+            print(f"paraphrases served from cache: {paraphrase_hits}/{len(QUESTIONS)} at threshold {args.threshold}")
+            print(f"different questions wrongly served: {false_hits}/{len(DIFFERENT)}")
+        finally:
+            await chat.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="hashing", help='"hashing" or a fastembed model name')
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--size", type=int, default=2048)
+    parser.add_argument("--repeats", type=int, default=50, help="timed lookups per paraphrase")
+    parser.add_argument("--first-token", type=float, default=0.4, help="stub time to first token in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="stub delay between tokens in seconds")
+    asyncio.run(main(parser.parse_args()))
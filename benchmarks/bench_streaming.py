@@ -0,0 +1,42 @@
+# Perceived follow-up latency: full completion (old) vs time to first streamed token (new).
+# Run from the repo root: python -m benchmarks.bench_streaming
+import argparse
+import asyncio
+import time
+
+from benchmarks.stubs import fixed_latency, make_openai_app, serve, summarize
+from deepseek import DeepSeekChat
+
+MESSAGES = [{"role": "user", "content": "Why is this cell taller?"}]
+REPLY = " ".join(["token"] * 300)
+
+
+async def main(args):
+    app = make_openai_app(latency=fixed_latency(args.first_token), reply=REPLY, token_delay=args.token_delay)
+    with serve(app) as base:
+        chat = DeepSeekChat(api_key="stub", base_url=f"{base}/v1")
+        try:
+            full, first = [], []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                await chat.complete(MESSAGES)
+                full.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                ttft = None
+                async for _token in chat.stream(MESSAGES):
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                first.append(ttft)
+            print(summarize("old: time to full answer", full, sum(full)))
+            print(summarize("new: time to first token", first, sum(first)))
+        finally:
+            await chat.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--first-token", type=float, default=0.4, help="stub time to first token in seconds")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="stub delay between tokens in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,74 @@
+# Design-space sweep throughput: point generation, batched evaluation and the Pareto front.
+# Local model (random weights unless --weights) for the large sweep, the stub batch endpoint for remote.
+# Run from the repo root: python -m benchmarks.bench_sweep
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.bench_local_model import random_weights
+from benchmarks.stubs import fixed_latency, make_predictor_app, serve
+from local_model import LocalPredictor
+from predictor import PredictorClient
+from sweep import PD, cell_volume, design_points, evaluate_local, evaluate_remote, pareto_front, parse_sweep
+
+GRID = "length=800:2000:{s} width=600:1800:{s} height=100:1600:{s} energy=40:100:{e} voltage=400:800:{e}"
+
+
+def timed(label: str, fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    print(f"  {label:<22} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    return result
+
+
+def report(points, predictions):
+    front = timed("pareto front", pareto_front, cell_volume(predictions), predictions[:, PD])
+    print(f"  {len(points):,} points -> {len(front)} on the front")
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.weights
+        if path is None:
+            path = os.path.join(tmp, "random.npz")
+            random_weights(path, hidden=64, depth=3)
+        model = LocalPredictor(path)
+
+        for label, text in (("grid", GRID.format(s=args.steps, e=args.energy_steps)),
+                            ("latin hypercube", f"{GRID.format(s=2, e=2)} samples={args.samples}")):
+            spec = parse_sweep(text)
+            print(f"local {label}:")
+            start = time.perf_counter()
+            points = timed("generate points", design_points, spec, 0)
+            predictions = timed("evaluate (local)", evaluate_local, model, points)
+            report(points, predictions)
+            wall = time.perf_counter() - start
+            print(f"  total {wall:.2f} s ({len(points) / wall:,.0f} points/s)")
+
+    with serve(make_predictor_app(latency=fixed_latency(args.latency), analysis="")) as base:
+        predictor = PredictorClient(f"{base}/predictions/")
+        try:
+            spec = parse_sweep(f"{GRID.format(s=2, e=2)} samples={args.remote_samples}")
+            points = design_points(spec, 0)
+            print(f"remote batches of {args.batch_size}:")
+            start = time.perf_counter()
+            predictions = await evaluate_remote(predictor, points, args.batch_size)
+            wall = time.perf_counter() - start
+            print(f"  evaluate (remote)      {wall * 1000:9.1f} ms ({len(points) / wall:,.0f} points/s)")
+            report(points, predictions)
+        finally:
+            await predictor.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights")
+    parser.add_argument("--steps", type=int, default=20, help="grid steps for the three pack dimensions")
+    parser.add_argument("--energy-steps", type=int, default=4, help="grid steps for energy and voltage")
+    parser.add_argument("--samples", type=int, default=200_000, help="Latin-hypercube samples")
+    parser.add_argument("--remote-samples", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub predictor latency per batch")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+# Event-loop lag and indicator update frames/sec while many sessions wait at once:
+# one animate_thinking task per message (old) vs the shared ThinkingTicker (new).
+# Also checks that every ticker update is emitted in the context of the session that owns it.
+# Run from the repo root: python -m benchmarks.bench_thinking
+import argparse
+import asyncio
+import contextvars
+import json
+import time
+
+from benchmarks.stubs import percentile
+from indicators import ThinkingTicker
+
+
+# Stands in for Chainlit's per-session context, which decides the websocket a message goes out on
+SESSION = contextvars.ContextVar("session", default=None)
+
+
+class FakeMessage:
+    # Stands in for cl.Message: every send/update/remove is one websocket frame
+    frames = 0
+    misrouted = 0
+
+    def __init__(self):
+        self.content = ""
+        self.session = SESSION.get()
+
+    async def _emit(self):
+        FakeMessage.frames += 1
+        FakeMessage.misrouted += SESSION.get() != self.session
+        json.dumps({"id": id(self), "output": self.content, "author": "GotionGPT"})
+        await asyncio.sleep(0)
+
+    send = update = remove = _emit
+
+
+async def animate_thinking(msg):
+    try:
+        i = 0
+        while True:
+            msg.content = f"🤖 GotionGPT is thinking{'.' * (i % 4)}"
+            await msg.update()
+            await asyncio.sleep(0.5)
+            i += 1
+    except asyncio.CancelledError:
+        pass
+
+
+async def measure_lag(duration: float, probe: float = 0.01):
+    lags = []
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        await asyncio.sleep(probe)
+        lags.append(time.perf_counter() - start - probe)
+    return lags
+
+
+async def old_style(sessions: int, duration: float):
+    messages = [FakeMessage() for _ in range(sessions)]
+    for msg in messages:
+        await msg.send()
+    tasks = [asyncio.create_task(animate_thinking(msg)) for msg in messages]
+    FakeMessage.frames = 0
+    lags = await measure_lag(duration)
+    frames = FakeMessage.frames
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks)
+    return lags, frames
+
+
+async def new_style(sessions: int, duration: float, animate: bool):
+    ticker = ThinkingTicker(interval=1.0, animate=animate)
+
+    async def open_session(session: int):
+        # gather runs each in its own task, so every session gets its own context like a Chainlit handler
+        SESSION.set(session)
+        return await ticker.show(FakeMessage(), "🤖 GotionGPT is thinking")
+
+    indicators = await asyncio.gather(*(open_session(session) for session in range(sessions)))
+    FakeMessage.frames = FakeMessage.misrouted = 0
+    lags = await measure_lag(duration)
+    frames, misrouted = FakeMessage.frames, FakeMessage.misrouted
+    for indicator in indicators:
+        await indicator.finish()
+    if misrouted:
+        raise AssertionError(f"{misrouted} of {frames} updates were emitted in another session's context")
+    return lags, frames
+
+
+async def main(args):
+    runs = (
+        ("old: task per message, 2 Hz", lambda: old_style(args.sessions, args.duration)),
+        ("new: shared ticker, static", lambda: new_style(args.sessions, args.duration, animate=False)),
+        ("new: shared ticker, 1 Hz dots", lambda: new_style(args.sessions, args.duration, animate=True)),
+    )
+    for label, run in runs:
+        lags, frames = await run()
+        print(f"{label:<32} frames/s={frames / args.duration:8.1f}  "
+              f"loop lag p50={percentile(lags, 50) * 1000:6.2f} ms  p99={percentile(lags, 99) * 1000:6.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to keep every session waiting")
+    asyncio.run(main(parser.parse_args()))
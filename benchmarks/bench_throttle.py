@@ -0,0 +1,43 @@
+# Per-message overhead of the rate limiter at high message rates, per backend.
+# Run from the repo root: python -m benchmarks.bench_throttle [--redis redis://localhost:6379/0]
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from throttle import MemoryBackend, SQLiteBackend, Throttle, create_backend
+
+
+async def run(name: str, backend, args):
+    session = Throttle("session", per_minute=20, burst=5, backend=backend)
+    ip = Throttle("ip", per_minute=60, burst=15, backend=backend)
+    keys = [f"client-{i}" for i in range(args.clients)]
+    throttled = 0
+    start = time.perf_counter()
+    for _ in range(args.messages):
+        # Same two checks handle_message makes for every incoming message
+        key = random.choice(keys)
+        throttled += bool(await session.check(key) or await ip.check(key))
+    elapsed = time.perf_counter() - start
+    print(f"{name:>7}: {elapsed / args.messages * 1e6:8.1f} µs/message  "
+          f"({args.messages / elapsed:,.0f} messages/s, {throttled / args.messages:.0%} throttled)")
+    await backend.aclose()
+
+
+async def main(args):
+    random.seed(0)
+    await run("memory", MemoryBackend(), args)
+    with tempfile.TemporaryDirectory() as tmp:
+        await run("sqlite", SQLiteBackend(os.path.join(tmp, "throttle.db")), args)
+    if args.redis:
+        await run("redis", create_backend(args.redis), args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=1_000)
+    parser.add_argument("--redis", help="also benchmark a Redis-protocol server at this URL")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,52 @@
+# Time to first prediction: bundled predictor analysis (remote mode) vs predictions-only
+# plus a streamed analysis from the app (app mode).
+# Run from the repo root: python -m benchmarks.bench_time_to_prediction
+import argparse
+import asyncio
+import time
+
+from benchmarks.stubs import SAMPLE_PACK, fixed_latency, make_openai_app, make_predictor_app, serve, summarize
+from deepseek import DeepSeekChat
+from history import analysis_prompt
+from predictor import PredictorClient
+
+
+async def main(args):
+    predictor_app = make_predictor_app(latency=fixed_latency(args.predict_latency), analysis_latency=args.analysis_latency)
+    llm_app = make_openai_app(latency=fixed_latency(args.first_token), reply=" ".join(["word"] * 200),
+                              token_delay=args.token_delay)
+    with serve(predictor_app) as predictor_base, serve(llm_app) as llm_base:
+        bundled = PredictorClient(f"{predictor_base}/predict/")
+        split = PredictorClient(f"{predictor_base}/predictions/")
+        chat = DeepSeekChat(api_key="stub", base_url=f"{llm_base}/v1")
+        try:
+            remote, app_prediction, app_analysis = [], [], []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                await bundled.predict(SAMPLE_PACK)
+                remote.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                data = await split.predict(SAMPLE_PACK)
+                app_prediction.append(time.perf_counter() - start)
+                messages = [{"role": "user", "content": analysis_prompt(SAMPLE_PACK, data["predictions"])}]
+                async for _token in chat.stream(messages):
+                    app_analysis.append(time.perf_counter() - start)
+                    break
+            print(summarize("remote: prediction + analysis", remote, sum(remote)))
+            print(summarize("app: prediction shown", app_prediction, sum(app_prediction)))
+            print(summarize("app: first analysis token", app_analysis, sum(app_analysis)))
+        finally:
+            await bundled.aclose()
+            await split.aclose()
+            await chat.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--predict-latency", type=float, default=0.05, help="stub model time in seconds")
+    parser.add_argument("--analysis-latency", type=float, default=4.0, help="stub bundled LLM time in seconds")
+    parser.add_argument("--first-token", type=float, default=0.5, help="stub DeepSeek time to first token")
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+# Parity check of the local model against recorded responses from the remote predictor.
+#   Record:  python -m benchmarks.check_local_parity --record recorded.jsonl --count 200
+#   Compare: python -m benchmarks.check_local_parity --weights model.npz --recorded recorded.jsonl
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+import numpy as np
+
+from local_model import LocalPredictor
+from predictor import API_URL, PACK_FIELDS, PREDICTION_FIELDS, PredictorClient
+
+
+def sample_packs(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            "Length_pack": float(rng.randint(600, 2000)),
+            "Width_pack": float(rng.randint(800, 2000)),
+            "Height_pack": float(rng.randint(100, 1600)),
+            "Energy": float(rng.randint(20, 120)),
+            "Total_Voltage": float(rng.choice([350, 400, 600, 800])),
+        }
+
+
+async def record(args):
+    predictor = PredictorClient(args.url, timeout=120.0)
+    try:
+        with open(args.record, "w") as f:
+            for inputs in sample_packs(args.count, args.seed):
+                data = await predictor.predict(inputs)
+                f.write(json.dumps({"inputs": inputs, "predictions": data["predictions"]}) + "\n")
+    finally:
+        await predictor.aclose()
+
+
+def compare(args) -> bool:
+    with open(args.recorded) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    packs = np.array([[r["inputs"][field] for field in PACK_FIELDS] for r in records], dtype=np.float32)
+    expected = np.array([[float(r["predictions"][field]) for field in PREDICTION_FIELDS] for r in records])
+
+    actual = LocalPredictor(args.weights).predict_array(packs)
+    ok = True
+    for i, field in enumerate(PREDICTION_FIELDS):
+        close = np.isclose(actual[:, i], expected[:, i], rtol=args.rtol, atol=args.atol)
+        abs_err = np.abs(actual[:, i] - expected[:, i])
+        print(f"{field:<14} max_abs_err={abs_err.max():.6g} mismatches={int((~close).sum())}/{len(records)}")
+        ok &= bool(close.all())
+    print("parity OK" if ok else "parity FAILED")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--weights")
+    parser.add_argument("--recorded")
+    parser.add_argument("--record", help="write fresh recordings from the remote predictor to this path")
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--rtol", type=float, default=1e-3)
+    parser.add_argument("--atol", type=float, default=1e-2)
+    args = parser.parse_args()
+    if args.record:
+        asyncio.run(record(args))
+    elif not (args.weights and args.recorded):
+        parser.error("--weights and --recorded are required unless --record is given")
+    else:
+        sys.exit(0 if compare(args) else 1)
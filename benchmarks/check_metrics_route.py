@@ -0,0 +1,60 @@
+# Check that mount_metrics serves the Prometheus exposition in front of a Chainlit-style catch-all route,
+# and that a route mounted with a token refuses scrapes without it.
+# Uses chainlit's own app when it is installed, otherwise a stand-in with the same catch-all.
+# Run from the repo root: python -m benchmarks.check_metrics_route
+import sys
+
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from metrics import MESSAGES_HANDLED, mount_metrics
+
+
+def chainlit_like_app():
+    async def frontend(request):
+        return HTMLResponse("<html>frontend</html>")
+
+    return Starlette(routes=[Route("/{full_path:path}", frontend)])
+
+
+def main():
+    try:
+        from chainlit.server import app
+        label = "chainlit.server.app"
+    except ImportError:
+        app, label = chainlit_like_app(), "stand-in catch-all app"
+
+    mount_metrics(app, "/metrics")
+    mount_metrics(app, "/metrics")  # a reload must not add a second route
+    mount_metrics(app, "/private-metrics", token="s3cret")
+    MESSAGES_HANDLED.labels("prediction").inc()
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        res = client.get("/metrics")
+        anonymous = client.get("/private-metrics")
+        authorized = client.get("/private-metrics", headers={"Authorization": "Bearer s3cret"})
+    problems = []
+    if res.status_code != 200:
+        problems.append(f"status {res.status_code}")
+    if not res.headers.get("content-type", "").startswith("text/plain"):
+        problems.append(f"content-type {res.headers.get('content-type')!r}")
+    if 'gotiongpt_messages_total{path="prediction"}' not in res.text:
+        problems.append("gotiongpt_messages_total missing from the body")
+    if anonymous.status_code != 401:
+        problems.append(f"token-protected route answered {anonymous.status_code} without the token")
+    if authorized.status_code != 200 or "gotiongpt_messages_total" not in authorized.text:
+        problems.append(f"token-protected route answered {authorized.status_code} with the token")
+    if sum(getattr(route, "path", None) == "/metrics" for route in app.router.routes) != 1:
+        problems.append("/metrics is mounted more than once")
+
+    if problems:
+        print(f"FAIL ({label}): {', '.join(problems)}")
+        return 1
+    print(f"OK ({label}): GET /metrics -> 200, {len(res.text.splitlines())} lines")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+# End-to-end load test: runs the Chainlit app against local predictor / DeepSeek stubs and drives it
+# with simulated users over Chainlit's socket.io websocket, mixing pack inputs and follow-ups.
+# Reports throughput, latency percentiles per path, throttled messages, event-loop lag, CPU and RSS as JSON.
+# Each simulated user arrives from its own address (X-Forwarded-For behind one trusted proxy hop), so the
+# default per-session and per-IP throttles apply as they would to real visitors; --throttle off disables them.
+# Needs python-socketio with its asyncio client (pip install "python-socketio[asyncio_client]").
+# Run from the repo root: python -m benchmarks.load_app --users 50 --output load_report.json
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+import socketio
+from prometheus_client.parser import text_string_to_metric_families
+
+from benchmarks.stubs import free_port, lognormal_latency, make_openai_app, make_predictor_app, percentile, serve
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FOLLOW_UPS = [
+    "What is power density?",
+    "Why is the cell this tall?",
+    "How could I raise the energy without making the pack longer?",
+    "Which chemistry would suit this pack?",
+    "Is 400 V a sensible total voltage here?",
+    "电芯的高度为什么这么高？",
+]
+FAILURE_MARKERS = ("❌", "⚠️", "🐢")
+
+
+def random_pack(rng: random.Random) -> str:
+    return (
+        f"{rng.randint(800, 2200)}, {rng.randint(600, 1800)}, {rng.randint(100, 1600)}, "
+        f"{rng.randint(30, 120)}, {rng.choice([350, 400, 600, 800])}"
+    )
+
+
+def scrape(client: httpx.Client, url: str) -> dict:
+    # {(name, labels): value} for every sample exposed by the app
+    samples = {}
+    for family in text_string_to_metric_families(client.get(url).text):
+        for sample in family.samples:
+            samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+    return samples
+
+
+def histogram_quantiles(before: dict, after: dict, name: str, quantiles=(50, 99)) -> dict:
+    # Upper bucket bounds containing each quantile of the observations made between the two scrapes
+    buckets = sorted(
+        (float(dict(labels)["le"]), value - before.get((sample_name, labels), 0.0))
+        for (sample_name, labels), value in after.items() if sample_name == f"{name}_bucket"
+    )
+    total = buckets[-1][1] if buckets else 0.0
+    result = {"count": int(total)}
+    for q in quantiles:
+        result[f"p{q}"] = next((le for le, count in buckets if total and count >= q / 100 * total), None)
+    return result
+
+
+class SimulatedUser:
+    def __init__(self, base: str, address: str, rng: random.Random, args, results: list):
+        self.base = base
+        self.address = address
+        self.rng = rng
+        self.args = args
+        self.results = results
+        self.events = asyncio.Queue()
+        self.thread_id = str(uuid.uuid4())
+        self.sio = None
+
+    async def run(self, delay: float):
+        await asyncio.sleep(delay)
+        sio = self.sio = socketio.AsyncClient(reconnection=False)
+
+        @sio.on("*")
+        async def on_event(event, data=None):
+            self.events.put_nowait((event, data))
+
+        try:
+            await sio.connect(
+                self.base,
+                socketio_path="/ws/socket.io",
+                transports=["websocket"],
+                headers={"X-Forwarded-For": self.address},
+                auth={
+                    "clientType": "webapp",
+                    "sessionId": str(uuid.uuid4()),
+                    "threadId": self.thread_id,
+                    "userEnv": "{}",
+                    "chatProfile": None,
+                },
+            )
+            await sio.emit("connection_successful")
+            await self._wait_for("new_message", self.args.timeout)  # welcome message from on_chat_start
+
+            for i in range(self.args.messages):
+                if i and self.args.think_time:
+                    await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time))
+                if i == 0 or self.rng.random() < self.args.pack_ratio:
+                    await self._send("prediction", random_pack(self.rng))
+                else:
+                    await self._send("follow_up", self.rng.choice(FOLLOW_UPS))
+        except Exception as err:
+            self.results.append({"path": "connect", "ok": False, "error": f"{type(err).__name__}: {err}"})
+        finally:
+            await sio.disconnect()
+
+    async def _wait_for(self, event_name: str, timeout: float):
+        deadline = time.perf_counter() + timeout
+        while True:
+            event, data = await asyncio.wait_for(self.events.get(), max(0.0, deadline - time.perf_counter()))
+            if event == event_name:
+                return data
+
+    async def _send(self, path: str, text: str):
+        while not self.events.empty():
+            self.events.get_nowait()
+        step = {
+            "id": str(uuid.uuid4()),
+            "threadId": self.thread_id,
+            "name": "User",
+            "type": "user_message",
+            "output": text,
+            "createdAt": datetime.now(timezone.utc).isoformat(),
+        }
+        sent = time.perf_counter()
+        await self.sio.emit("client_message", {"message": step, "fileReferences": []})
+        first, ok, error = None, True, None
+        deadline = sent + self.args.timeout
+        try:
+            while True:
+                event, data = await asyncio.wait_for(self.events.get(), max(0.0, deadline - time.perf_counter()))
+                if event in ("new_message", "stream_start", "update_message") and first is None:
+                    first = time.perf_counter() - sent
+                if event in ("new_message", "update_message") and isinstance(data, dict):
+                    output = data.get("output") or ""
+                    if output.startswith(FAILURE_MARKERS) or "\n\n❌" in output:
+                        ok, error = False, output.splitlines()[0][:200]
+                if event == "task_end":
+                    break
+        except asyncio.TimeoutError:
+            ok, error = False, "timeout"
+        self.results.append({
+            "path": path,
+            "ok": ok,
+            "error": error,
+            "first_response": first,
+            "latency": time.perf_counter() - sent,
+        })
+
+
+def path_report(samples: list) -> dict:
+    latencies = [s["latency"] for s in samples if s["ok"]]
+    firsts = [s["first_response"] for s in samples if s["ok"] and s["first_response"] is not None]
+    errors = {}
+    for sample in samples:
+        if not sample["ok"]:
+            errors[sample["error"]] = errors.get(sample["error"], 0) + 1
+    return {
+        "count": len(samples),
+        "failed": len(samples) - len(latencies),
+        "errors": errors,
+        "latency_s": {f"p{q}": percentile(latencies, q) for q in (50, 90, 99)},
+        "first_response_s": {f"p{q}": percentile(firsts, q) for q in (50, 90, 99)},
+    }
+
+
+async def drive(base: str, args) -> tuple:
+    rng = random.Random(args.seed)
+    results = []
+    users = []
+    for i in range(args.users):
+        address = f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}"
+        user = SimulatedUser(base, address, random.Random(rng.random()), args, results)
+        users.append(user.run(delay=args.ramp * i / max(1, args.users)))
+    start = time.perf_counter()
+    await asyncio.gather(*users)
+    return results, time.perf_counter() - start
+
+
+def main(args):
+    predictor_app = make_predictor_app(latency=lognormal_latency(args.predict_latency, args.predict_sigma),
+                                       error_rate=args.predict_error_rate)
+    llm_app = make_openai_app(latency=lognormal_latency(args.first_token, args.llm_sigma),
+                              reply=" ".join(["word"] * args.reply_tokens), token_delay=args.token_delay,
+                              error_rate=args.llm_error_rate)
+    with serve(predictor_app) as predictor_base, serve(llm_app) as llm_base:
+        port = free_port()
+        base = f"http://127.0.0.1:{port}"
+        env = {
+            **os.environ,
+            "ANALYSIS_MODE": "app",
+            "PREDICTIONS_URL": f"{predictor_base}/predictions/",
+            "DEEPSEEK_API_KEY": "stub",
+            "DEEPSEEK_BASE_URL": f"{llm_base}/v1",
+            "THROTTLE_PROXY_HOPS": "1",
+            "METRICS_PATH": "/metrics",
+        }
+        if args.throttle == "off":
+            env.update(THROTTLE_SESSION_PER_MINUTE="0", THROTTLE_IP_PER_MINUTE="0")
+        app = subprocess.Popen(
+            [sys.executable, "-m", "chainlit", "run", "chainlit_app.py", "--headless",
+             "--host", "127.0.0.1", "--port", str(port)],
+            cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL if args.quiet else None,
+        )
+        try:
+            with httpx.Client(timeout=5) as http:
+                deadline = time.time() + args.startup_timeout
+                while True:
+                    if app.poll() is not None:
+                        raise SystemExit(f"chainlit exited with code {app.returncode} during startup")
+                    try:
+                        # The frontend route answers as soon as the server is up
+                        if http.get(f"{base}/").status_code == 200:
+                            break
+                    except httpx.HTTPError:
+                        pass
+                    if time.time() > deadline:
+                        raise SystemExit("chainlit did not start in time")
+                    time.sleep(0.25)
+                res = http.get(f"{base}/metrics")
+                if res.status_code != 200 or "gotiongpt_" not in res.text:
+                    raise SystemExit(f"GET /metrics returned {res.status_code} without the app's metrics")
+
+                before = scrape(http, f"{base}/metrics")
+                peak_rss = [before.get(("process_resident_memory_bytes", ()), 0.0)]
+
+                async def run_with_sampling():
+                    async def sample_rss():
+                        async with httpx.AsyncClient(timeout=5) as client:
+                            while True:
+                                await asyncio.sleep(1)
+                                text = (await client.get(f"{base}/metrics")).text
+                                for family in text_string_to_metric_families(text):
+                                    if family.name == "process_resident_memory_bytes":
+                                        peak_rss.append(family.samples[0].value)
+
+                    sampler = asyncio.create_task(sample_rss())
+                    try:
+                        return await drive(base, args)
+                    finally:
+                        sampler.cancel()
+
+                results, wall = asyncio.run(run_with_sampling())
+                after = scrape(http, f"{base}/metrics")
+        finally:
+            app.terminate()
+            try:
+                app.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                app.kill()
+
+    cpu = after.get(("process_cpu_seconds_total", ()), 0.0) - before.get(("process_cpu_seconds_total", ()), 0.0)
+    completed = [sample for sample in results if sample["path"] != "connect"]
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "host": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "quiet")},
+        "wall_s": wall,
+        "messages": len(completed),
+        "throughput_msg_s": len(completed) / wall if wall else 0.0,
+        "connect_failures": len(results) - len(completed),
+        "paths": {
+            path: path_report([sample for sample in completed if sample["path"] == path])
+            for path in ("prediction", "follow_up")
+        },
+        "throttled": {
+            scope: int(after.get(("gotiongpt_throttled_messages_total", (("scope", scope),)), 0.0)
+                       - before.get(("gotiongpt_throttled_messages_total", (("scope", scope),)), 0.0))
+            for scope in ("session", "ip")
+        },
+        "event_loop_lag_s": histogram_quantiles(before, after, "gotiongpt_event_loop_lag_seconds"),
+        "cpu": {"seconds": cpu, "utilization": cpu / wall if wall else 0.0},
+        "rss_bytes": {"start": peak_rss[0], "peak": max(peak_rss), "end": after.get(("process_resident_memory_bytes", ()))},
+    }
+
+    for path, stats in report["paths"].items():
+        print(f"{path:<11} n={stats['count']:<5} failed={stats['failed']:<4} "
+              f"p50={stats['latency_s']['p50'] * 1000:8.1f} ms  p99={stats['latency_s']['p99'] * 1000:8.1f} ms  "
+              f"first p50={stats['first_response_s']['p50'] * 1000:8.1f} ms")
+    print(f"throttled: session={report['throttled']['session']} ip={report['throttled']['ip']}")
+    print(f"throughput={report['throughput_msg_s']:.1f} msg/s  cpu={report['cpu']['utilization']:.0%}  "
+          f"peak rss={max(peak_rss) / 2 ** 20:.0f} MiB  loop lag p99<={report['event_loop_lag_s']['p99']} s")
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=50, help="concurrent simulated sessions")
+    parser.add_argument("--messages", type=int, default=6, help="messages per session")
+    parser.add_argument("--pack-ratio", type=float, default=0.3, help="share of later messages that are pack inputs")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean pause between messages in seconds")
+    parser.add_argument("--ramp", type=float, default=5.0, help="seconds over which sessions connect")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-message timeout in seconds")
+    parser.add_argument("--predict-latency", type=float, default=0.1, help="stub predictor median latency")
+    parser.add_argument("--predict-sigma", type=float, default=0.5)
+    parser.add_argument("--predict-error-rate", type=float, default=0.0)
+    parser.add_argument("--first-token", type=float, default=0.5, help="stub DeepSeek median time to first token")
+    parser.add_argument("--llm-sigma", type=float, default=0.5)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.01)
+    parser.add_argument("--reply-tokens", type=int, default=150)
+    parser.add_argument("--throttle", choices=("default", "off"), default="default",
+                        help="keep the app's default message throttles, or disable them")
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="load_report.json")
+    parser.add_argument("--quiet", action="store_true", help="hide the app's own log output")
+    main(parser.parse_args())
@@ -0,0 +1,66 @@
+# Follow-up throughput: sync OpenAI client in asyncio.to_thread (old) vs shared DeepSeekChat (new).
+# Run from the repo root: python -m benchmarks.load_deepseek
+import argparse
+import asyncio
+import time
+
+from openai import OpenAI
+
+from benchmarks.stubs import fixed_latency, make_openai_app, serve, summarize
+from deepseek import DeepSeekChat
+
+MESSAGES = [{"role": "user", "content": "What is power density?"}]
+
+
+def threaded_sync_client(base_url):
+    client = OpenAI(api_key="stub", base_url=base_url)
+
+    async def call():
+        start = time.perf_counter()
+        await asyncio.to_thread(client.chat.completions.create, model="deepseek-chat", messages=MESSAGES, max_tokens=500)
+        return time.perf_counter() - start
+    return call, client.close
+
+
+def shared_async_client(base_url, max_concurrency):
+    chat = DeepSeekChat(api_key="stub", base_url=base_url, max_concurrency=max_concurrency, max_connections=max_concurrency)
+
+    async def call():
+        start = time.perf_counter()
+        await chat.complete(MESSAGES)
+        return time.perf_counter() - start
+    return call, chat.aclose
+
+
+async def run_sessions(call, sessions, questions):
+    async def session():
+        return [await call() for _ in range(questions)]
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(session() for _ in range(sessions)))
+    wall = time.perf_counter() - start
+    return [sample for samples in results for sample in samples], wall
+
+
+async def main(args):
+    with serve(make_openai_app(latency=fixed_latency(args.latency))) as base:
+        base_url = f"{base}/v1"
+        for sessions in args.sessions:
+            for label, factory in (("old: to_thread + sync", lambda: threaded_sync_client(base_url)),
+                                   ("new: AsyncOpenAI", lambda: shared_async_client(base_url, args.max_concurrency))):
+                call, close = factory()
+                samples, wall = await run_sessions(call, sessions, args.questions)
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+                print(f"{summarize(f'{sessions:>4} sessions {label}', samples, wall)}  "
+                      f"throughput={len(samples) / wall:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--questions", type=int, default=3, help="follow-ups per session")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub completion time in seconds")
+    parser.add_argument("--max-concurrency", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,192 @@
+import asyncio
+import contextlib
+import json
+import random
+import socket
+import threading
+import time
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+# 🧪 Local stand-ins for the remote services, used by the benchmark scripts
+
+SAMPLE_PACK = {
+    "Length_pack": 1000.0,
+    "Width_pack": 1600.0,
+    "Height_pack": 1500.0,
+    "Energy": 60.0,
+    "Total_Voltage": 400.0,
+}
+
+
+def fake_predictions(pack: dict) -> dict:
+    # Deterministic, cheap function of the inputs so caches and parity checks have something to compare
+    length = float(pack.get("Length_pack", 0))
+    width = float(pack.get("Width_pack", 0))
+    height = float(pack.get("Height_pack", 0))
+    energy = float(pack.get("Energy", 0))
+    voltage = float(pack.get("Total_Voltage", 0))
+    return {
+        "Length_cell": 0.18 * length + 0.02 * voltage,
+        "Width_cell": 0.03 * width + 0.1 * energy,
+        "Height_cell": 0.06 * height + 0.05 * energy,
+        "Power_density": 120.0 + 0.9 * energy + 0.05 * voltage - 0.00001 * length * width * height / 1000,
+    }
+
+
+def fixed_latency(seconds: float):
+    return lambda: seconds
+
+
+def lognormal_latency(median: float, sigma: float = 1.0, cap: float = 10.0):
+    # Heavy-tailed service time: most calls near the median, a few far slower
+    import math
+    mu = math.log(median)
+    return lambda: min(random.lognormvariate(mu, sigma), cap)
+
+
+def _injected_error(error_rate: float):
+    # A 503 with probability error_rate, as a struggling upstream would return
+    if error_rate and random.random() < error_rate:
+        return JSONResponse({"detail": "stub overloaded"}, status_code=503)
+    return None
+
+
+def make_predictor_app(latency=fixed_latency(0.0), analysis: str = "Stub analysis of the pack.",
+                       batch: bool = True, analysis_latency: float = 0.0, error_rate: float = 0.0) -> Starlette:
+    # /predict/ bundles an analysis that costs analysis_latency extra; /predictions/ returns predictions only
+    async def predict(request):
+        pack = await request.json()
+        await asyncio.sleep(latency() + analysis_latency)
+        return _injected_error(error_rate) or JSONResponse(
+            {"predictions": fake_predictions(pack), "deepseek_analysis": analysis}
+        )
+
+    async def predictions_only(request):
+        pack = await request.json()
+        await asyncio.sleep(latency())
+        return _injected_error(error_rate) or JSONResponse({"predictions": fake_predictions(pack)})
+
+    async def predict_batch(request):
+        packs = await request.json()
+        await asyncio.sleep(latency() + analysis_latency)
+        return _injected_error(error_rate) or JSONResponse(
+            [{"predictions": fake_predictions(pack), "deepseek_analysis": analysis} for pack in packs]
+        )
+
+    async def predictions_only_batch(request):
+        packs = await request.json()
+        await asyncio.sleep(latency())
+        return _injected_error(error_rate) or JSONResponse([{"predictions": fake_predictions(pack)} for pack in packs])
+
+    async def root(request):
+        return JSONResponse({"status": "ok"})
+
+    routes = [
+        Route("/", root, methods=["GET", "HEAD"]),
+        Route("/predict/", predict, methods=["POST"]),
+        Route("/predictions/", predictions_only, methods=["POST"]),
+    ]
+    if batch:
+        routes.append(Route("/predict/batch", predict_batch, methods=["POST"]))
+        routes.append(Route("/predictions/batch", predictions_only_batch, methods=["POST"]))
+    return Starlette(routes=routes)
+
+
+def make_openai_app(latency=fixed_latency(0.0), reply: str = "Power density is energy per unit mass.",
+                    token_delay: float = 0.0, error_rate: float = 0.0) -> Starlette:
+    # Minimal OpenAI-compatible /chat/completions endpoint; latency() is the time to the first token
+    async def completions(request):
+        body = await request.json()
+        model = body.get("model", "deepseek-chat")
+        usage = {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20}
+        await asyncio.sleep(latency())
+        error = _injected_error(error_rate)
+        if error is not None:
+            return error
+        if not body.get("stream"):
+            return JSONResponse({
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": reply},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        async def events():
+            for i, word in enumerate(reply.split(" ")):
+                if i and token_delay:
+                    await asyncio.sleep(token_delay)
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word if i == 0 else f" {word}"}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            final = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            if body.get("stream_options", {}).get("include_usage"):
+                yield f"data: {json.dumps({**final, 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return Starlette(routes=[Route("/v1/chat/completions", completions, methods=["POST"])])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _ThreadedServer(uvicorn.Server):
+    def install_signal_handlers(self):
+        pass
+
+
+@contextlib.contextmanager
+def serve(app, port: int = 0):
+    # Runs the app on its own thread and event loop so the stub does not compete with the client being measured
+    port = port or free_port()
+    server = _ThreadedServer(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, samples, wall: float) -> str:
+    return (
+        f"{name:<32} n={len(samples):<5} p50={percentile(samples, 50) * 1000:8.2f} ms  "
+        f"p99={percentile(samples, 99) * 1000:8.2f} ms  wall={wall:6.2f} s"
+    )
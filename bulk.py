@@ -0,0 +1,129 @@
+import asyncio
+import csv
+import itertools
+import os
+import time
+from collections import deque
+
+from predictor import PACK_FIELDS, PREDICTION_FIELDS
+
+# 📄 Bulk pack predictions from CSV/XLSX uploads
+
+BULK_SUFFIXES = (".csv", ".xlsx")
+
+
+class BulkInputError(Exception):
+    pass
+
+
+def _match_columns(header) -> dict:
+    # Map each pack field to its column index, ignoring case and surrounding whitespace
+    normalized = [str(name).strip().lower() if name is not None else "" for name in header]
+    missing = [field for field in PACK_FIELDS if field.lower() not in normalized]
+    if missing:
+        raise BulkInputError(f"Missing column(s): {', '.join(missing)}")
+    return {field: normalized.index(field.lower()) for field in PACK_FIELDS}
+
+
+def _iter_csv(path: str):
+    # Decoding and parse errors surface row by row, so they are translated here rather than in open_rows
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            yield from csv.reader(f)
+    except UnicodeDecodeError as err:
+        raise BulkInputError("The CSV is not UTF-8 text; save it as 'CSV UTF-8' and upload it again") from err
+    except csv.Error as err:
+        raise BulkInputError(f"The CSV is malformed: {err}") from err
+
+
+def _iter_xlsx(path: str):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as err:
+        raise BulkInputError("Excel uploads need the 'openpyxl' package; upload a CSV instead") from err
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else value for value in row]
+    finally:
+        workbook.close()
+
+
+def open_rows(path: str):
+    # Returns the header, the pack column positions and a lazy iterator over the data rows
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix == ".csv":
+        rows = _iter_csv(path)
+    elif suffix == ".xlsx":
+        rows = _iter_xlsx(path)
+    else:
+        raise BulkInputError(f"Unsupported file type '{suffix}'; use CSV or XLSX")
+
+    header = next(rows, None)
+    if header is None:
+        raise BulkInputError("The file is empty")
+    header = [str(name).strip() for name in header]
+    columns = _match_columns(header)
+    return header, columns, (row for row in rows if any(str(value).strip() for value in row))
+
+
+def _pack_inputs(columns: dict, row) -> dict:
+    return {field: float(row[index]) for field, index in columns.items()}
+
+
+async def _predict_row(predict, columns: dict, row) -> tuple:
+    try:
+        data = await predict(_pack_inputs(columns, row))
+        predictions = data.get("predictions") or {}
+        return row, [float(predictions[field]) for field in PREDICTION_FIELDS], ""
+    except Exception as err:
+        return row, ["" for _ in PREDICTION_FIELDS], f"{type(err).__name__}: {err}"
+
+
+async def map_ordered(fn, items, concurrency: int = 32):
+    # Keeps at most `concurrency` fn(item) calls in flight and yields results in input order,
+    # so memory stays flat however long `items` is
+    in_flight = deque()
+    try:
+        for item in items:
+            in_flight.append(asyncio.ensure_future(fn(item)))
+            if len(in_flight) >= concurrency:
+                yield await in_flight.popleft()
+        while in_flight:
+            yield await in_flight.popleft()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
+def predict_rows(columns: dict, rows, predict, concurrency: int = 32):
+    return map_ordered(lambda row: _predict_row(predict, columns, row), rows, concurrency)
+
+
+async def predict_file(in_path: str, out_path: str, predict, concurrency: int = 32, on_progress=None,
+                       progress_every: float = 2.0, max_rows: int = None) -> dict:
+    if max_rows is not None:
+        # Refuse oversized files before making any predictions
+        _, _, counted = open_rows(in_path)
+        if next(itertools.islice(counted, max_rows, None), None) is not None:
+            raise BulkInputError(f"The file has more than {max_rows:,} rows; the limit here is {max_rows:,}")
+    header, columns, rows = open_rows(in_path)
+
+    stats = {"rows": 0, "failed": 0, "seconds": 0.0}
+    start = last_report = time.perf_counter()
+    with open(out_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([*header, *PREDICTION_FIELDS, "error"])
+        async for row, results, error in predict_rows(columns, rows, predict, concurrency):
+            writer.writerow([*row, *results, error])
+            stats["rows"] += 1
+            stats["failed"] += bool(error)
+            now = time.perf_counter()
+            if on_progress is not None and now - last_report >= progress_every:
+                last_report = now
+                await on_progress(stats["rows"])
+    stats["seconds"] = time.perf_counter() - start
+    if stats["rows"] == 0:
+        raise BulkInputError("The file has no data rows")
+    return stats
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+from metrics import PREDICTION_CACHE_EVICTIONS, PREDICTION_CACHE_HITS, PREDICTION_CACHE_MISSES
+from predictor import PACK_FIELDS
+
+
+# 💾 LRU + TTL cache of predictor responses keyed on the parsed pack inputs
+
+class PredictionCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 24 * 3600, precision: int = 1, path: str = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.precision = precision
+        self._entries = OrderedDict()
+        self._db = None
+        # SQLite writes run in a worker thread; the lock keeps them in the order the entries changed
+        self._write_lock = asyncio.Lock()
+        if path:
+            self._open(path)
+
+    def key(self, inputs: dict) -> tuple:
+        return tuple(round(float(inputs[field]), self.precision) for field in PACK_FIELDS)
+
+    async def get(self, inputs: dict):
+        key = self.key(inputs)
+        entry = self._entries.get(key)
+        if entry is None:
+            PREDICTION_CACHE_MISSES.inc()
+            return None
+
+        stored_at, data = entry
+        if time.time() - stored_at > self.ttl:
+            await self._discard(key, "expired")
+            PREDICTION_CACHE_MISSES.inc()
+            return None
+
+        self._entries.move_to_end(key)
+        PREDICTION_CACHE_HITS.inc()
+        return data
+
+    async def put(self, inputs: dict, data: dict):
+        key = self.key(inputs)
+        stored_at = time.time()
+        self._entries[key] = (stored_at, data)
+        self._entries.move_to_end(key)
+        await self._write(
+            "INSERT OR REPLACE INTO predictions (key, stored_at, data) VALUES (?, ?, ?)",
+            lambda: (json.dumps(key), stored_at, json.dumps(data)),
+        )
+        while len(self._entries) > self.max_entries:
+            await self._discard(next(iter(self._entries)), "capacity")
+
+    def __len__(self):
+        return len(self._entries)
+
+    async def aclose(self):
+        if self._db is not None:
+            db, self._db = self._db, None
+            async with self._write_lock:
+                await asyncio.to_thread(db.close)
+
+    async def _discard(self, key: tuple, reason: str):
+        del self._entries[key]
+        PREDICTION_CACHE_EVICTIONS.labels(reason).inc()
+        await self._write("DELETE FROM predictions WHERE key = ?", lambda: (json.dumps(key),))
+
+    async def _write(self, sql: str, params):
+        # params is a callable so the JSON encoding also happens off the event loop
+        if self._db is None:
+            return
+        db = self._db
+        async with self._write_lock:
+            await asyncio.to_thread(self._commit, db, sql, params)
+
+    @staticmethod
+    def _commit(db, sql: str, params):
+        with db:
+            db.execute(sql, params())
+
+    def _open(self, path: str):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, stored_at REAL, data TEXT)"
+            )
+            self._db.execute("DELETE FROM predictions WHERE stored_at < ?", (time.time() - self.ttl,))
+
+        # Warm the in-memory LRU with the most recent surviving entries, oldest first
+        rows = self._db.execute(
+            "SELECT key, stored_at, data FROM predictions ORDER BY stored_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for key, stored_at, data in reversed(rows):
+            self._entries[tuple(json.loads(key))] = (stored_at, json.loads(data))
+        if len(rows) == self.max_entries:
+            with self._db:
+                self._db.execute("DELETE FROM predictions WHERE stored_at < ?", (rows[-1][1],))
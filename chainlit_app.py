@@ -1,81 +1,512 @@
 import chainlit as cl
-import httpx
+from chainlit.server import app as chainlit_server
 import asyncio
 import os
-import re
-from openai import OpenAI
+import socket
+import tempfile
+import time
 from dotenv import load_dotenv
 
+from batching import PredictionBatcher
+from bulk import BULK_SUFFIXES, BulkInputError, predict_file
+from cache import PredictionCache
+from deepseek import DEEPSEEK_BASE_URL, DeepSeekChat
+from history import ChatHistory, analysis_prompt, extractive_summary, load_token_counter
+from indicators import ThinkingTicker
+from local_model import LocalPredictor
+from metrics import (
+    ACTIVE_SESSIONS,
+    HISTORY_PROMPT_TOKENS,
+    MESSAGE_SECONDS,
+    MESSAGES_HANDLED,
+    PARSE_INPUTS,
+    THROTTLED_MESSAGES,
+    TIME_TO_PREDICTION_SECONDS,
+    mount_metrics,
+    watch_event_loop_lag,
+)
+from optimize import OUTPUT_UNITS, OptimizeError, Problem, optimize, outputs, result_markdown
+from parsing import parse_input
+from predictor import API_URL, PACK_FIELDS, PredictorClient, PredictorDecodeError, PredictorError, PredictorStatusError
+from resilience import CircuitBreaker, CircuitOpenError, HedgePolicy, RetryPolicy
+from semantic_cache import SemanticCache, load_embedder, refers_back
+from sweep import (
+    PD,
+    SweepError,
+    cell_volume,
+    design_points,
+    evaluate_local,
+    evaluate_remote,
+    front_figure,
+    front_table,
+    parse_sweep,
+    pareto_front,
+    point_count,
+    write_csv,
+)
+from throttle import Throttle, client_ip, create_backend
+from tracing import configure_tracing, shutdown_tracing, span
+from warmup import PredictorWarmer
+
 # Load environment variables
 load_dotenv()
+
+# 📊 Prometheus scrape endpoint on Chainlit's own web server, off unless METRICS_PATH is set (e.g. /metrics).
+# The app is public, so set METRICS_TOKEN too unless only an internal network can reach it
+METRICS_PATH = os.getenv("METRICS_PATH", "")
+if METRICS_PATH:
+    mount_metrics(chainlit_server, METRICS_PATH, token=os.getenv("METRICS_TOKEN") or None)
+# How often to sample event-loop lag (0 disables)
+EVENT_LOOP_LAG_INTERVAL = float(os.getenv("EVENT_LOOP_LAG_INTERVAL", "0.5"))
+loop_lag_task = None
+
+# 🔭 Per-stage spans: TRACE_EXPORTER=otlp (local collector) or file:/path/traces.jsonl
+configure_tracing(os.getenv("TRACE_EXPORTER") or None)
+
 DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url="https://api.deepseek.com")
-
-API_URL = "https://battery-size-cnn.onrender.com/predict/"
-
-# 🔁 Chat memory for DeepSeek follow-ups
-chat_history = [
-    {
-        "role": "system",
-        "content": (
-            "You are GotionGPT, an expert AI assistant specialized in battery pack and cell optimization. "
-            "Explain concepts clearly using plain markdown. Avoid LaTeX formatting (no \\[ \\, \\text{}, \\frac{}). "
-            "Do NOT use markdown headings (#). Use bold labels like **Battery Pack Specs**, and format formulas like `E = P × t`."
+DEEPSEEK_MAX_CONCURRENCY = int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "100"))
+DEEPSEEK_TIMEOUT = float(os.getenv("DEEPSEEK_TIMEOUT", "60"))
+# Account-wide DeepSeek budgets shared by all sessions (0 disables)
+DEEPSEEK_RPM = float(os.getenv("DEEPSEEK_RPM", "0"))
+DEEPSEEK_TPM = float(os.getenv("DEEPSEEK_TPM", "0"))
+deepseek_chat = DeepSeekChat(
+    api_key=DEEPSEEK_API_KEY,
+    base_url=os.getenv("DEEPSEEK_BASE_URL") or DEEPSEEK_BASE_URL,  # e.g. a local stub for load tests
+    max_concurrency=DEEPSEEK_MAX_CONCURRENCY,
+    max_connections=DEEPSEEK_MAX_CONCURRENCY,
+    timeout=DEEPSEEK_TIMEOUT,
+    deployment=os.getenv("DEPLOYMENT_NAME") or socket.gethostname(),
+    requests_per_minute=DEEPSEEK_RPM,
+    tokens_per_minute=DEEPSEEK_TPM,
+)
+
+
+# 🧠 ANALYSIS_MODE=app shows predictions as soon as they arrive and streams the DeepSeek analysis from
+# this app; point PREDICTIONS_URL at a predictions-only route so the predictor skips its own LLM call.
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "remote").lower()
+if ANALYSIS_MODE == "app" and not os.getenv("PREDICTIONS_URL"):
+    # API_URL would run the predictor's analysis alongside this app's, paying for two LLM calls per pack
+    raise RuntimeError("ANALYSIS_MODE=app needs PREDICTIONS_URL pointing at a predictions-only route")
+PREDICTIONS_URL = os.getenv("PREDICTIONS_URL") if ANALYSIS_MODE == "app" else API_URL
+# Batch endpoints pair with their route: PREDICTIONS_BATCH_URL for predictions-only, PREDICTOR_BATCH_URL
+# for API_URL (both default to <url>/batch)
+PREDICTOR_BATCH_URL = os.getenv("PREDICTIONS_BATCH_URL" if ANALYSIS_MODE == "app" else "PREDICTOR_BATCH_URL") or None
+
+# 🔌 Predictor connection pool (shared for the lifetime of the app)
+predictor = PredictorClient(
+    PREDICTIONS_URL,
+    batch_url=PREDICTOR_BATCH_URL,
+    retry=RetryPolicy(
+        attempts=int(os.getenv("PREDICTOR_RETRY_ATTEMPTS", "3")),
+        base_delay=float(os.getenv("PREDICTOR_RETRY_BASE_DELAY", "0.25")),
+        max_delay=float(os.getenv("PREDICTOR_RETRY_MAX_DELAY", "4")),
+    ),
+    breaker=CircuitBreaker(
+        "predictor",
+        failure_rate=float(os.getenv("PREDICTOR_BREAKER_FAILURE_RATE", "0.5")),
+        window=int(os.getenv("PREDICTOR_BREAKER_WINDOW", "20")),
+        min_calls=int(os.getenv("PREDICTOR_BREAKER_MIN_CALLS", "5")),
+        reset_timeout=float(os.getenv("PREDICTOR_BREAKER_RESET_TIMEOUT", "30")),
+    ),
+    # Opt-in: PREDICTOR_HEDGE=true fires a duplicate request once the first passes the latency percentile
+    hedge=HedgePolicy(
+        percentile=float(os.getenv("PREDICTOR_HEDGE_PERCENTILE", "95")),
+        max_extra_ratio=float(os.getenv("PREDICTOR_HEDGE_MAX_RATIO", "0.05")),
+    ) if os.getenv("PREDICTOR_HEDGE", "false").lower() in ("1", "true", "yes") else None,
+    timeout=float(os.getenv("PREDICTOR_TIMEOUT", "30")),
+    max_connections=int(os.getenv("PREDICTOR_MAX_CONNECTIONS", "100")),
+    max_keepalive_connections=int(os.getenv("PREDICTOR_MAX_KEEPALIVE", "20")),
+    keepalive_expiry=float(os.getenv("PREDICTOR_KEEPALIVE_EXPIRY", "60")),
+    http2=os.getenv("PREDICTOR_HTTP2", "false").lower() in ("1", "true", "yes"),
+)
+
+# 🔥 Wake the predictor at startup and keep it warm while sessions are active
+predictor_warmer = PredictorWarmer(
+    predictor,
+    health_url=os.getenv("PREDICTOR_HEALTH_URL") or None,
+    interval=float(os.getenv("PREDICTOR_PING_INTERVAL", "600")),
+    cold_threshold=float(os.getenv("PREDICTOR_COLD_THRESHOLD", "5")),
+)
+
+# 📦 Coalesce predictions arriving within a short window into one batch request (0 disables)
+PREDICTOR_BATCH_WINDOW_MS = float(os.getenv("PREDICTOR_BATCH_WINDOW_MS", "15"))
+prediction_batcher = PredictionBatcher(
+    predictor,
+    window=PREDICTOR_BATCH_WINDOW_MS / 1000,
+    max_batch=int(os.getenv("PREDICTOR_BATCH_MAX", "64")),
+)
+
+
+# 🧮 Optional in-process model: PREDICTOR_BACKEND=local with LOCAL_MODEL_PATH pointing at exported weights.
+# With the remote backend, LOCAL_MODEL_PATH serves as the fallback while the predictor circuit is open.
+PREDICTOR_BACKEND = os.getenv("PREDICTOR_BACKEND", "remote").lower()
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH")
+if PREDICTOR_BACKEND == "local" and not LOCAL_MODEL_PATH:
+    raise RuntimeError("PREDICTOR_BACKEND=local needs LOCAL_MODEL_PATH pointing at exported weights")
+local_backend = LocalPredictor(LOCAL_MODEL_PATH) if LOCAL_MODEL_PATH else None
+local_predictor = local_backend if PREDICTOR_BACKEND == "local" else None
+
+
+async def predict_pack(input_data: dict) -> dict:
+    if local_predictor is not None:
+        return await local_predictor.predict(input_data)
+    try:
+        if PREDICTOR_BATCH_WINDOW_MS > 0:
+            return await prediction_batcher.predict(input_data)
+        return await predictor.predict(input_data)
+    except CircuitOpenError:
+        if local_backend is None:
+            raise
+        return await local_backend.predict(input_data)
+
+# 💾 Prediction cache (set PREDICTION_CACHE_PATH to persist across restarts)
+prediction_cache = PredictionCache(
+    max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("PREDICTION_CACHE_TTL", "86400")),
+    precision=int(os.getenv("PREDICTION_CACHE_PRECISION", "1")),
+    path=os.getenv("PREDICTION_CACHE_PATH") or None,
+)
+
+# 🗺️ /sweep design-space exploration (the local model, when loaded, handles large sweeps)
+# Remote sweeps, bulk uploads and /optimize only need the numbers. The default API_URL (/predict/) also
+# runs the predictor's own DeepSeek analysis for every point, so set PREDICTIONS_URL to a predictions-only
+# route to avoid paying for one LLM call per design; without it SWEEP_MAX_REMOTE_POINTS and
+# BULK_MAX_REMOTE_ROWS keep that cost bounded.
+SWEEP_PREDICTIONS_URL = os.getenv("PREDICTIONS_URL")
+design_predictor = PredictorClient(
+    SWEEP_PREDICTIONS_URL,
+    batch_url=os.getenv("PREDICTIONS_BATCH_URL") or None,
+    retry=predictor.retry,
+    timeout=float(os.getenv("PREDICTOR_TIMEOUT", "30")),
+) if SWEEP_PREDICTIONS_URL and SWEEP_PREDICTIONS_URL != PREDICTIONS_URL else predictor
+
+SWEEP_DEFAULT_STEPS = int(os.getenv("SWEEP_DEFAULT_STEPS", "10"))
+SWEEP_MAX_POINTS = int(os.getenv("SWEEP_MAX_POINTS", "1000000"))
+SWEEP_MAX_REMOTE_POINTS = int(os.getenv("SWEEP_MAX_REMOTE_POINTS", "500"))
+SWEEP_BATCH_SIZE = int(os.getenv("SWEEP_BATCH_SIZE", "256"))
+SWEEP_USAGE = (
+    "Usage: `/sweep length=800:2000:8 width=600:1800:8 height=100:300:5 energy=60 voltage=400`\n\n"
+    "Give each field a value, `lo:hi` or `lo:hi:steps`; add `samples=N` for Latin-hypercube sampling."
+)
+
+# 📄 Bulk CSV/XLSX predictions
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "16"))
+BULK_MAX_SIZE_MB = int(os.getenv("BULK_MAX_SIZE_MB", "50"))
+BULK_MAX_REMOTE_ROWS = int(os.getenv("BULK_MAX_REMOTE_ROWS", "500"))
+BULK_MIME_TYPES = ["text/csv", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"]
+
+
+async def predict_bulk_row(input_data: dict) -> dict:
+    if local_predictor is not None:
+        return await local_predictor.predict(input_data)
+    return await design_predictor.predict(input_data)
+
+# 🎯 /optimize inverse design: a few surrogate-guided predictor calls instead of a full sweep
+OPTIMIZE_BUDGET = int(os.getenv("OPTIMIZE_BUDGET", "60"))
+OPTIMIZE_MAX_BUDGET = int(os.getenv("OPTIMIZE_MAX_BUDGET", "200"))
+OPTIMIZE_BATCH = int(os.getenv("OPTIMIZE_BATCH", "4"))
+OPTIMIZE_USAGE = (
+    "Usage: `/optimize length=800:2000 width=600:1800 height=100:300 energy=60 voltage=400 cell_length<300`\n\n"
+    "Give each pack field a value or `lo:hi`, then any constraints on `cell_length`, `cell_width`, "
+    "`cell_height`, `power_density` or `cell_volume` (`<`, `<=`, `>`, `>=`). The default goal is "
+    "`maximize=power_density`; add `minimize=cell_volume` or similar to change it, and `budget=N` "
+    "for the number of predictions."
+)
+
+# 🔁 Chat memory for DeepSeek follow-ups (one bounded history per session)
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", "20"))
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "6000"))
+# Past this many prompt tokens, older turns are folded into a pinned summary (0 disables)
+HISTORY_COMPACT_TOKENS = int(os.getenv("HISTORY_COMPACT_TOKENS", "2500"))
+HISTORY_KEEP_RECENT = int(os.getenv("HISTORY_KEEP_RECENT", "4"))
+HISTORY_SUMMARIZER = os.getenv("HISTORY_SUMMARIZER", "extractive").lower()
+count_tokens = load_token_counter(os.getenv("TOKENIZER_PATH") or None)
+
+
+async def summarize_history(previous, messages):
+    if HISTORY_SUMMARIZER != "model":
+        return await extractive_summary(previous, messages)
+    transcript = "\n\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    prompt = [
+        {
+            "role": "system",
+            "content": (
+                "Summarize this battery design conversation in at most 8 short bullet points. "
+                "Keep every number, unit and design decision."
+            ),
+        },
+        {"role": "user", "content": f"Earlier summary:\n{previous}\n\n{transcript}" if previous else transcript},
+    ]
+    try:
+        return await deepseek_chat.complete(prompt, max_tokens=300)
+    except Exception:
+        return await extractive_summary(previous, messages)
+
+def get_chat_history() -> ChatHistory:
+    chat_history = cl.user_session.get("chat_history")
+    if chat_history is None:
+        chat_history = ChatHistory(
+            cl.user_session.get("id"),
+            max_messages=HISTORY_MAX_MESSAGES,
+            max_tokens=HISTORY_MAX_TOKENS,
+            count_tokens=count_tokens,
+            compact_tokens=HISTORY_COMPACT_TOKENS,
+            keep_recent=HISTORY_KEEP_RECENT,
         )
-    }
-]
+        cl.user_session.set("chat_history", chat_history)
+    return chat_history
+
+# 🔎 Semantic cache for repeated follow-up questions about the same prediction
+# ("hashing" needs no download and matches rewordings of a question; SEMANTIC_CACHE_MODEL can name a
+# fastembed model such as BAAI/bge-small-en-v1.5 to also match synonyms)
+semantic_cache = SemanticCache(
+    embedder=load_embedder(os.getenv("SEMANTIC_CACHE_MODEL", "hashing")),
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "604800")),
+) if os.getenv("SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes") else None
+
+# 🐢 Per-client message limits (THROTTLE_BACKEND=sqlite:/path or redis://... to share them between workers)
+throttle_backend = create_backend(os.getenv("THROTTLE_BACKEND", "memory"))
+session_throttle = Throttle(
+    "session",
+    per_minute=float(os.getenv("THROTTLE_SESSION_PER_MINUTE", "20")),
+    burst=float(os.getenv("THROTTLE_SESSION_BURST", "5")),
+    backend=throttle_backend,
+)
+ip_throttle = Throttle(
+    "ip",
+    per_minute=float(os.getenv("THROTTLE_IP_PER_MINUTE", "60")),
+    burst=float(os.getenv("THROTTLE_IP_BURST", "15")),
+    backend=throttle_backend,
+)
+# Number of reverse proxies in front of the app that append to X-Forwarded-For. Render (which sets
+# RENDER=true) has one; with 0 behind a proxy every visitor would share the proxy's per-IP bucket
+THROTTLE_PROXY_HOPS = int(os.getenv("THROTTLE_PROXY_HOPS") or ("1" if os.getenv("RENDER") else "0"))
+
+
+async def throttled() -> float:
+    # Seconds the current client has to wait, 0 if the message may proceed
+    environ = getattr(cl.context.session, "environ", None) or {}
+    for throttle, key in ((session_throttle, cl.user_session.get("id")),
+                          (ip_throttle, client_ip(environ, THROTTLE_PROXY_HOPS))):
+        if key is None:
+            continue
+        wait = await throttle.check(key)
+        if wait:
+            THROTTLED_MESSAGES.labels(throttle.name).inc()
+            return wait
+    return 0.0
+
+# ⏳ One shared ticker drives every "thinking" message (THINKING_ANIMATION=true adds animated dots)
+thinking = ThinkingTicker(
+    interval=float(os.getenv("THINKING_TICK_SECONDS", "1")),
+    animate=os.getenv("THINKING_ANIMATION", "false").lower() in ("1", "true", "yes"),
+)
+
+def describe_predictor_error(err: PredictorError) -> str:
+    if isinstance(err, PredictorStatusError):
+        return f"❌ API call failed.\n\n**Status Code:** {err.status_code}\n```json\n{err.body}\n```"
+    if isinstance(err, PredictorDecodeError):
+        return f"❌ Could not decode JSON.\n```text\n{err.body}\n```\n**Error:** `{err}`"
+    if isinstance(err, CircuitOpenError):
+        return "❌ The predictor is failing right now, so requests are paused for a moment. Please try again shortly."
+    return f"❌ Could not reach the predictor.\n\n**Error:** `{err}`"
+
+async def run_bulk_prediction(path: str, name: str):
+    progress_msg = cl.Message(content=f"📄 Predicting packs from **{name}**...")
+    await progress_msg.send()
+
+    async def on_progress(rows):
+        progress_msg.content = f"📄 Predicting packs from **{name}**... {rows} rows done"
+        await progress_msg.update()
+
+    fd, out_path = tempfile.mkstemp(prefix="gotiongpt-", suffix=".csv")
+    os.close(fd)
+    try:
+        try:
+            # Without a predictions-only route every remote row also pays for a DeepSeek analysis
+            max_rows = None if local_predictor is not None or SWEEP_PREDICTIONS_URL else BULK_MAX_REMOTE_ROWS
+            stats = await predict_file(path, out_path, predict_bulk_row, BULK_CONCURRENCY, on_progress,
+                                       max_rows=max_rows)
+        except BulkInputError as err:
+            progress_msg.content = f"❌ Could not read **{name}**: {err}"
+            await progress_msg.update()
+            return
+        except Exception:
+            # handle_message reports the error; don't leave the progress count behind
+            progress_msg.content = f"❌ Could not finish **{name}**."
+            await progress_msg.update()
+            raise
+
+        rate = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+        progress_msg.content = (
+            f"✅ Predicted **{stats['rows'] - stats['failed']}** of **{stats['rows']}** packs from **{name}** "
+            f"in {stats['seconds']:.1f} s ({rate:.0f} rows/s)."
+        )
+        await progress_msg.update()
+        result_name = f"{os.path.splitext(name)[0]}_predictions.csv"
+        await cl.Message(
+            content="📥 Results with predicted cell dimensions:",
+            elements=[cl.File(name=result_name, path=out_path, display="inline")],
+        ).send()
+    finally:
+        os.remove(out_path)
+
+async def run_sweep(text: str):
+    try:
+        spec = parse_sweep(text, SWEEP_DEFAULT_STEPS)
+    except SweepError as err:
+        await cl.Message(content=f"❌ {err}\n\n{SWEEP_USAGE}").send()
+        return
+    n = point_count(spec)
+    # Like bulk uploads: only remote sweeps that would also pay for a DeepSeek analysis per design get the tight cap
+    limit = SWEEP_MAX_POINTS if local_backend is not None or SWEEP_PREDICTIONS_URL else SWEEP_MAX_REMOTE_POINTS
+    if n > limit:
+        await cl.Message(
+            content=f"❌ That sweep has {n:,} designs; the limit here is {limit:,}. "
+                    f"Use fewer steps (`lo:hi:steps`) or `samples=N`.\n\n{SWEEP_USAGE}"
+        ).send()
+        return
+
+    indicator = await thinking.show(cl.Message(content=""), f"🗺️ Evaluating {n:,} designs")
+    try:
+        start = time.perf_counter()
+        points = design_points(spec)
+        if local_backend is not None:
+            predictions = await asyncio.to_thread(evaluate_local, local_backend, points)
+        else:
+            predictions = await evaluate_remote(design_predictor, points, SWEEP_BATCH_SIZE)
+        volume, density = cell_volume(predictions), predictions[:, PD]
+        front = pareto_front(volume, density)
+        seconds = time.perf_counter() - start
+    except Exception:
+        await indicator.finish()  # handle_message reports the error; don't leave the ticker running
+        raise
+
+    if not len(front):
+        await indicator.finish("❌ The predictor returned no usable results for this sweep.")
+        return
+    await indicator.finish()
+
+    fd, out_path = tempfile.mkstemp(prefix="gotiongpt-sweep-", suffix=".csv")
+    os.close(fd)
+    try:
+        write_csv(out_path, points, predictions, front)
+        elements = [cl.File(name="pareto_front.csv", path=out_path, display="inline")]
+        figure = front_figure(volume, density, front)
+        if figure is not None:
+            elements.append(cl.Plotly(name="pareto_front", figure=figure, display="inline"))
+        await cl.Message(
+            content=(
+                f"🗺️ **{len(front)} Pareto-optimal designs** (smallest cell volume vs highest power density) "
+                f"out of {n:,} evaluated in {seconds:.1f} s\n\n{front_table(points, predictions, front)}"
+            ),
+            elements=elements,
+        ).send()
+    finally:
+        os.remove(out_path)
 
-# ✅ Spinner animation loop
-async def animate_thinking(msg):
+async def run_optimize(text: str):
     try:
-        i = 0
-        while True:
-            msg.content = f"🤖 GotionGPT is thinking{'.' * (i % 4)}"
-            await msg.update()
-            await asyncio.sleep(0.5)
-            i += 1
-    except asyncio.CancelledError:
-        pass
-
-# ✅ Flexible input parser
-
-def parse_input(text: str):
-    clean_text = re.sub(r"[，、;|]", ",", text.lower())
-
-    field_patterns = {
-        "Length_pack": r"(length|long)\D*(\d+(\.\d+)?)",
-        "Width_pack": r"(width|wide)\D*(\d+(\.\d+)?)",
-        "Height_pack": r"(height|tall)\D*(\d+(\.\d+)?)",
-        "Energy": r"(energy|capacity)\D*(\d+(\.\d+)?)",
-        "Total_Voltage": r"(voltage)\D*(\d+(\.\d+)?)"
-    }
-
-    extracted = {}
-    for key, pattern in field_patterns.items():
-        match = re.search(pattern, clean_text)
-        if match:
-            extracted[key] = float(match.group(2))
-
-    if len(extracted) == 5:
-        return extracted
+        problem = Problem.parse(text, OPTIMIZE_BUDGET)
+    except (OptimizeError, SweepError) as err:
+        await cl.Message(content=f"❌ {err}\n\n{OPTIMIZE_USAGE}").send()
+        return
+    problem.budget = max(1, min(problem.budget, OPTIMIZE_MAX_BUDGET))
+
+    indicator = await thinking.show(cl.Message(content=""), f"🎯 Optimizing: 0/{problem.budget} predictions")
+
+    async def evaluate(points):
+        if local_backend is not None:
+            return await asyncio.to_thread(evaluate_local, local_backend, points)
+        return await evaluate_remote(design_predictor, points, SWEEP_BATCH_SIZE)
+
+    async def on_progress(done, budget, best):
+        status = f"🎯 Optimizing: {done}/{budget} predictions"
+        if best is not None:
+            value = outputs(best[None])[problem.objective][0]
+            status += f", best so far {value:.2f} {OUTPUT_UNITS[problem.objective]}"
+        indicator.set_text(status)
 
     try:
-        numbers = [float(x.strip()) for x in clean_text.split(",") if x.strip()]
-        if len(numbers) == 5:
-            return {
-                "Length_pack": numbers[0],
-                "Width_pack": numbers[1],
-                "Height_pack": numbers[2],
-                "Energy": numbers[3],
-                "Total_Voltage": numbers[4]
-            }
-    except ValueError:
-        pass
-
-    return None
+        start = time.perf_counter()
+        with span("optimize", {"optimize.budget": problem.budget}) as optimize_span:
+            result = await optimize(problem, evaluate, batch=OPTIMIZE_BATCH, on_progress=on_progress)
+            optimize_span.set_attribute("optimize.rounds", result["rounds"])
+            optimize_span.set_attribute("optimize.feasible", result["feasible"])
+    except Exception:
+        await indicator.finish()  # handle_message reports the error; don't leave the ticker running
+        raise
+    await indicator.finish()
+    await cl.Message(content=result_markdown(problem, result, time.perf_counter() - start)).send()
+
+async def stream_deepseek_reply(chat_history: ChatHistory, status: str, failure: str):
+    indicator = await thinking.show(cl.Message(content=""), status)
+    with span("history.compact"):
+        await chat_history.compact(summarize_history)
+    HISTORY_PROMPT_TOKENS.observe(chat_history.tokens)
+
+    def on_queue(ahead):
+        indicator.set_text(f"⏳ DeepSeek is busy; {ahead} request(s) ahead of yours" if ahead else status)
+
+    reply_msg = cl.Message(content="", author="DeepSeek AI")
+    reply = None
+    streaming = False
+    with span("deepseek.stream", {"llm.prompt_tokens_estimate": chat_history.tokens}) as llm:
+        try:
+            async for token in deepseek_chat.stream(chat_history.messages(), max_tokens=500,
+                                                    session=chat_history.session_id, on_queue=on_queue):
+                if not streaming:
+                    # First chunk: swap the spinner for the streamed answer
+                    streaming = True
+                    await indicator.finish()
+                await reply_msg.stream_token(token)
+            chat_history.append("assistant", reply_msg.content)
+            reply = reply_msg.content
+
+        except Exception as api_err:
+            llm.record_exception(api_err)
+            error = f"❌ {failure}:\n```text\n{api_err}```"
+            if streaming:
+                await reply_msg.stream_token(f"\n\n{error}")
+            else:
+                reply_msg.content = error
+
+        finally:
+            if not streaming:
+                await indicator.finish()
+
+    await reply_msg.send()
+    return reply
+
+@cl.on_app_startup
+async def app_startup():
+    global loop_lag_task
+    predictor.http  # open the pool before the first prediction
+    if EVENT_LOOP_LAG_INTERVAL > 0:
+        loop_lag_task = asyncio.create_task(watch_event_loop_lag(EVENT_LOOP_LAG_INTERVAL))
+    if local_predictor is None:
+        predictor_warmer.start()
+
+@cl.on_app_shutdown
+async def app_shutdown():
+    if loop_lag_task is not None:
+        loop_lag_task.cancel()
+    await predictor_warmer.stop()
+    await predictor.aclose()
+    if design_predictor is not predictor:
+        await design_predictor.aclose()
+    await deepseek_chat.aclose()
+    await prediction_cache.aclose()
+    await throttle_backend.aclose()
+    shutdown_tracing()
 
 @cl.on_chat_start
 async def start():
+    ACTIVE_SESSIONS.inc()
+    get_chat_history()
+    predictor_warmer.session_started()
     await cl.Message(
         content=(
             "🔋 Hi! This is **GotionGPT**, your AI assistant - **NOT limited to** battery cell design and optimization.\n\n"
@@ -83,112 +514,193 @@ async def start():
             "Enter your input like this:\n"
             "`Length_pack (mm), Width_pack (mm), Height_pack (mm), Energy (kWh), Total Voltage (V)`\n\n"
             "Example: `1000, 1600, 1500, 60, 400`\n\n"
+            "Have many designs? Type `/bulk` to upload a CSV or Excel file with the five pack columns, "
+            "`/sweep` to explore a range of packs and get the power-density / cell-volume Pareto front, "
+            "or `/optimize` to search a range for the best pack meeting your cell constraints.\n\n"
             "Note: I speak both **English** and **Chinese**, so feel free to chat in either!\n"
         )
     ).send()
 
+@cl.on_chat_end
+async def end():
+    ACTIVE_SESSIONS.dec()
+    predictor_warmer.session_ended()
+    chat_history = cl.user_session.get("chat_history")
+    if chat_history is not None:
+        chat_history.close()
+
 @cl.on_message
 async def handle_message(message: cl.Message):
-    try:
-        input_data = parse_input(message.content)
-
-        # ✅ Handle Initial Model Prediction
-        if input_data:
-            analyzing_msg = cl.Message(content="🤖 GotionGPT is analyzing")
-            await analyzing_msg.send()
-            analyzing_task = asyncio.create_task(animate_thinking(analyzing_msg))
+    received = time.perf_counter()
+    with span("chat.message", {"message.length": len(message.content)}) as root:
+        path = "error"
+        try:
+            wait = await throttled()
+            if wait:
+                path = "throttled"
+                await cl.Message(
+                    content=f"🐢 You're sending messages faster than GotionGPT can answer them. "
+                            f"Please wait {max(1, round(wait))} s and try again."
+                ).send()
+                return
 
-            async with httpx.AsyncClient(timeout=30.0) as client_http:
-                try:
-                    res = await client_http.post(API_URL, json=input_data)
-                    status = res.status_code
-                    if status != 200:
-                        analyzing_task.cancel()
-                        await analyzing_msg.update(
-                            content=f"❌ API call failed.\n\n**Status Code:** {status}\n```json\n{res.text}\n```"
-                        )
-                        return
-                    data = res.json()
-                except Exception as json_err:
-                    analyzing_task.cancel()
-                    await analyzing_msg.update(
-                        content=f"❌ Could not decode JSON.\n```text\n{res.text}\n```\n**Error:** `{json_err}`"
-                    )
-                    return
+            # 📄 Bulk predictions from attached or requested files
+            uploads = [
+                element for element in message.elements or []
+                if getattr(element, "path", None) and element.name.lower().endswith(BULK_SUFFIXES)
+            ]
+            if uploads:
+                path = "bulk"
+                for upload in uploads:
+                    await run_bulk_prediction(upload.path, upload.name)
+                return
 
-            predictions = data.get("predictions")
-            deepseek = data.get("deepseek_analysis", "")
+            if message.content.strip().lower() == "/bulk":
+                path = "bulk"
+                files = await cl.AskFileMessage(
+                    content=f"Upload a CSV or XLSX file with the columns `{', '.join(PACK_FIELDS)}`.",
+                    accept=BULK_MIME_TYPES,
+                    max_size_mb=BULK_MAX_SIZE_MB,
+                    timeout=600,
+                ).send()
+                if files:
+                    await run_bulk_prediction(files[0].path, files[0].name)
+                return
 
-            if not predictions:
-                analyzing_task.cancel()
-                await analyzing_msg.update(content="❌ The API did not return predictions.")
+            if message.content.strip().lower().startswith("/sweep"):
+                path = "sweep"
+                await run_sweep(message.content)
                 return
 
-            try:
-                length = float(predictions.get("Length_cell", 0))
-                width = float(predictions.get("Width_cell", 0))
-                height = float(predictions.get("Height_cell", 0))
-                power_density = float(predictions.get("Power_density", 0))
-            except (TypeError, ValueError) as e:
-                analyzing_task.cancel()
-                await analyzing_msg.update(
-                    content=f"❌ Prediction data was invalid:\n```python\n{predictions}\n```\n**Error:** {e}"
-                )
+            if message.content.strip().lower().startswith("/optimize"):
+                path = "optimize"
+                await run_optimize(message.content)
                 return
 
-            analyzing_task.cancel()
-            await analyzing_msg.remove()
-
-            pred_msg = (
-                f"📐 **Predicted Cell Dimensions from self-developed NN-based predictor**\n"
-                f"- Length: {length:.0f} mm\n"
-                f"- Width: {width:.0f} mm\n"
-                f"- Height: {height:.0f} mm\n"
-                f"- Power Density: {power_density:.2f} Wh/kg"
-            )
-            await cl.Message(content=pred_msg).send()
-
-            if isinstance(deepseek, str):
-                chat_history.append({"role": "user", "content": "Analyze this battery pack and predicted cell specs."})
-                chat_history.append({"role": "assistant", "content": deepseek})
-                await cl.Message(content=deepseek, author="DeepSeek AI").send()
-            elif isinstance(deepseek, dict) and "message" in deepseek:
-                await cl.Message(content=f"❌ DeepSeek Error:\n\n{deepseek['message']}", author="DeepSeek AI").send()
-            else:
-                await cl.Message(content="🧠 DeepSeek did not return a valid analysis.").send()
-            return
+            with span("parse_input") as parse_span:
+                input_data = parse_input(message.content)
+                parse_span.set_attribute("parse_input.parsed", bool(input_data))
+            PARSE_INPUTS.labels("parsed" if input_data else "unparsed").inc()
 
-        # 🧠 Follow-up Q&A with DeepSeek
-        follow_up = message.content.strip()
-        chat_history.append({"role": "user", "content": follow_up})
+            # ✅ Handle Initial Model Prediction
+            if input_data:
+                path = "prediction"
+                data = await prediction_cache.get(input_data)
+                root.set_attribute("prediction_cache.hit", data is not None)
+                indicator = None
 
-        thinking_msg = cl.Message(content="🤖 GotionGPT is thinking")
-        await thinking_msg.send()
-        animation_task = asyncio.create_task(animate_thinking(thinking_msg))
+                async def report_failure(content):
+                    if indicator is None:
+                        await cl.Message(content=content).send()
+                        return
+                    await indicator.finish(content)
 
-        try:
-            response = await asyncio.to_thread(
-                client.chat.completions.create,
-                model="deepseek-chat",
-                messages=chat_history,
-                max_tokens=500
-            )
+                if data is None:
+                    indicator = await thinking.show(cl.Message(content=""), "🤖 GotionGPT is analyzing")
 
-            reply = response.choices[0].message.content
-            chat_history.append({"role": "assistant", "content": reply})
+                    if local_predictor is None and predictor_warmer.warming:
+                        # Don't burn the request timeout on a cold start the warmer is already waiting out
+                        indicator.set_text("🔥 The predictor is waking up after being idle; this can take up to a minute")
+                        await predictor_warmer.wait_until_warm(predictor_warmer.timeout)
+                        indicator.set_text("🤖 GotionGPT is analyzing")
 
-        except Exception as api_err:
-            reply = f"❌ DeepSeek follow-up failed:\n```text\n{api_err}```"
+                    try:
+                        with span("predict_pack", {"predictor.backend": PREDICTOR_BACKEND}):
+                            data = await predict_pack(input_data)
+                    except PredictorError as err:
+                        await report_failure(describe_predictor_error(err))
+                        return
 
-        finally:
-            animation_task.cancel()
-            await thinking_msg.remove()
+                predictions = data.get("predictions")
+                deepseek = data.get("deepseek_analysis") if ANALYSIS_MODE == "remote" else None
 
-        await cl.Message(content=reply, author="DeepSeek AI").send()
+                if not predictions:
+                    await report_failure("❌ The API did not return predictions.")
+                    return
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        await cl.Message(
-            content=f"⚠️ Unexpected error: `{type(e).__name__}`\nPlease try again or check your server logs."
-        ).send()
+                try:
+                    length = float(predictions.get("Length_cell", 0))
+                    width = float(predictions.get("Width_cell", 0))
+                    height = float(predictions.get("Height_cell", 0))
+                    power_density = float(predictions.get("Power_density", 0))
+                except (TypeError, ValueError) as e:
+                    await report_failure(
+                        f"❌ Prediction data was invalid:\n```python\n{predictions}\n```\n**Error:** {e}"
+                    )
+                    return
+
+                if indicator is not None:
+                    await indicator.finish()
+                    # Only complete answers are worth replaying; in app mode the analysis is regenerated
+                    if ANALYSIS_MODE == "app":
+                        await prediction_cache.put(input_data, {"predictions": predictions})
+                    elif isinstance(deepseek, str) and deepseek:
+                        await prediction_cache.put(input_data, data)
+
+                pred_msg = (
+                    f"📐 **Predicted Cell Dimensions from self-developed NN-based predictor**\n"
+                    f"- Length: {length:.0f} mm\n"
+                    f"- Width: {width:.0f} mm\n"
+                    f"- Height: {height:.0f} mm\n"
+                    f"- Power Density: {power_density:.2f} Wh/kg"
+                )
+                with span("render.prediction"):
+                    await cl.Message(content=pred_msg).send()
+                TIME_TO_PREDICTION_SECONDS.labels(ANALYSIS_MODE, "hit" if indicator is None else "miss").observe(
+                    time.perf_counter() - received
+                )
+
+                if ANALYSIS_MODE == "app":
+                    chat_history = get_chat_history()
+                    chat_history.append("user", analysis_prompt(input_data, predictions), prediction=True)
+                    await stream_deepseek_reply(chat_history, "🤖 GotionGPT is analyzing", "DeepSeek analysis failed")
+                elif deepseek is None:
+                    # Local (and fallback) predictions come without a remote analysis; keep the specs
+                    # in history anyway so follow-up questions can refer to them
+                    chat_history = get_chat_history()
+                    chat_history.append("user", analysis_prompt(input_data, predictions), prediction=True)
+                    chat_history.append("assistant", pred_msg)
+                elif isinstance(deepseek, str):
+                    chat_history = get_chat_history()
+                    chat_history.append("user", analysis_prompt(input_data, predictions), prediction=True)
+                    chat_history.append("assistant", deepseek)
+                    await cl.Message(content=deepseek, author="DeepSeek AI").send()
+                elif isinstance(deepseek, dict) and "message" in deepseek:
+                    await cl.Message(content=f"❌ DeepSeek Error:\n\n{deepseek['message']}", author="DeepSeek AI").send()
+                else:
+                    await cl.Message(content="🧠 DeepSeek did not return a valid analysis.").send()
+                return
+
+            # 🧠 Follow-up Q&A with DeepSeek
+            path = "follow_up"
+            chat_history = get_chat_history()
+            question = message.content.strip()
+            # The key covers the question and the pinned prediction, not what "that" meant a few turns ago
+            if semantic_cache is None or refers_back(question):
+                chat_history.append("user", question)
+                await stream_deepseek_reply(chat_history, "🤖 GotionGPT is thinking", "DeepSeek follow-up failed")
+                return
+
+            context = chat_history.prediction["content"] if chat_history.prediction else ""
+            answer, vector = await semantic_cache.lookup(question, context)
+            chat_history.append("user", question)
+            if answer is not None:
+                chat_history.append("assistant", answer)
+                await cl.Message(content=answer, author="DeepSeek AI").send()
+                return
+            reply = await stream_deepseek_reply(chat_history, "🤖 GotionGPT is thinking", "DeepSeek follow-up failed")
+            if reply:
+                await semantic_cache.store(question, context, reply, vector)
+
+        except Exception as e:
+            path = "error"
+            import traceback
+            traceback.print_exc()
+            await cl.Message(
+                content=f"⚠️ Unexpected error: `{type(e).__name__}`\nPlease try again or check your server logs."
+            ).send()
+
+        finally:
+            root.set_attribute("gotiongpt.path", path)
+            MESSAGES_HANDLED.labels(path).inc()
+            MESSAGE_SECONDS.labels(path).observe(time.perf_counter() - received)
@@ -0,0 +1,116 @@
+import logging
+import time
+
+import httpx
+from openai import AsyncOpenAI
+
+from history import estimate_tokens
+from limits import FairLimiter
+from metrics import (
+    DEEPSEEK_COMPLETION_TOKENS,
+    DEEPSEEK_ERRORS,
+    DEEPSEEK_GENERATION_SECONDS,
+    DEEPSEEK_PROMPT_TOKENS,
+    DEEPSEEK_REQUEST_SECONDS,
+    DEEPSEEK_TTFT_SECONDS,
+)
+from tracing import current_span
+
+logger = logging.getLogger(__name__)
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+
+
+# 🧠 Shared async DeepSeek client for follow-up questions
+
+class DeepSeekChat:
+    def __init__(self, api_key: str, base_url: str = DEEPSEEK_BASE_URL, model: str = "deepseek-chat",
+                 max_concurrency: int = 100, max_connections: int = 100, timeout: float = 60.0,
+                 deployment: str = "default", requests_per_minute: float = 0, tokens_per_minute: float = 0):
+        self.model = model
+        self.deployment = deployment
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=self._http)
+        self.limiter = FairLimiter(max_concurrency, requests_per_minute, tokens_per_minute)
+
+    @staticmethod
+    def _reserve(messages: list, max_tokens: int) -> int:
+        # Tokens held against the per-minute budget until DeepSeek reports actual usage
+        return sum(estimate_tokens(message["content"]) for message in messages) + max_tokens
+
+    async def complete(self, messages: list, max_tokens: int = 500, session="default") -> str:
+        reserved = self._reserve(messages, max_tokens)
+        async with self.limiter.slot(session, reserved):
+            start = time.perf_counter()
+            try:
+                response = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                )
+            except Exception as err:
+                DEEPSEEK_ERRORS.labels(type(err).__name__).inc()
+                raise
+            DEEPSEEK_REQUEST_SECONDS.observe(time.perf_counter() - start)
+        self._record_usage(response.usage, reserved)
+        return response.choices[0].message.content
+
+    async def stream(self, messages: list, max_tokens: int = 500, session="default", on_queue=None):
+        # Yields content deltas as they arrive; the concurrency slot is held until the stream ends.
+        # on_queue(ahead) reports the caller's place in the queue while it waits for a slot.
+        reserved = self._reserve(messages, max_tokens)
+        async with self.limiter.slot(session, reserved, on_queue):
+            start = time.perf_counter()
+            ttft = None
+            try:
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                async for chunk in stream:
+                    if chunk.usage is not None:
+                        self._record_usage(chunk.usage, reserved)
+                    if not chunk.choices:
+                        continue
+                    token = chunk.choices[0].delta.content
+                    if not token:
+                        continue
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                        DEEPSEEK_TTFT_SECONDS.observe(ttft)
+                    yield token
+            except Exception as err:
+                DEEPSEEK_ERRORS.labels(type(err).__name__).inc()
+                raise
+            total = time.perf_counter() - start
+            DEEPSEEK_GENERATION_SECONDS.observe(total)
+            logger.info("DeepSeek stream: ttft=%.3fs total=%.3fs", ttft if ttft is not None else total, total)
+
+    def _record_usage(self, usage, reserved: int = 0):
+        # DeepSeek reports context-cache hits as prompt_cache_hit_tokens / prompt_cache_miss_tokens
+        if usage is None:
+            return
+        self.limiter.adjust_tokens((usage.prompt_tokens or 0) + (usage.completion_tokens or 0) - reserved)
+        hit = getattr(usage, "prompt_cache_hit_tokens", None)
+        miss = getattr(usage, "prompt_cache_miss_tokens", None)
+        if hit is None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            hit = (getattr(details, "cached_tokens", None) or 0) if details is not None else 0
+            miss = usage.prompt_tokens - hit
+        DEEPSEEK_PROMPT_TOKENS.labels(self.deployment, "hit").inc(hit)
+        DEEPSEEK_PROMPT_TOKENS.labels(self.deployment, "miss").inc(miss or 0)
+        DEEPSEEK_COMPLETION_TOKENS.labels(self.deployment).inc(usage.completion_tokens or 0)
+        current_span().set_attributes({
+            "llm.prompt_tokens": usage.prompt_tokens or 0,
+            "llm.prompt_cache_hit_tokens": hit,
+            "llm.completion_tokens": usage.completion_tokens or 0,
+        })
+
+    async def aclose(self):
+        await self.client.close()
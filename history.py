@@ -0,0 +1,203 @@
+import functools
+import re
+import weakref
+
+from metrics import HISTORY_COMPACTIONS, HISTORY_MAX_SESSION_BYTES, HISTORY_SESSION_BYTES, HISTORY_TOTAL_BYTES
+
+SYSTEM_PROMPT = (
+    "You are GotionGPT, an expert AI assistant specialized in battery pack and cell optimization. "
+    "Explain concepts clearly using plain markdown. Avoid LaTeX formatting (no \\[ \\, \\text{}, \\frac{}). "
+    "Do NOT use markdown headings (#). Use bold labels like **Battery Pack Specs**, and format formulas like `E = P × t`."
+)
+
+# Static domain context shared by every session. Together with SYSTEM_PROMPT it forms a byte-identical
+# prompt prefix, which DeepSeek's context cache serves at the cached-token rate.
+DOMAIN_CONTEXT = (
+    "Context: GotionGPT's self-developed NN-based battery size predictor maps five pack inputs, "
+    "Length_pack, Width_pack and Height_pack in mm, Energy in kWh and Total_Voltage in V, to a predicted cell "
+    "Length_cell, Width_cell and Height_cell in mm and the cell Power_density in Wh/kg. "
+    "User messages that start with \"Analyze this battery pack\" carry the pack inputs and the predicted cell "
+    "for the current design; later questions refer to the most recent of these unless the user says otherwise. "
+    "Pack energy relates to cell capacity through E = V × Ah, series count follows from Total_Voltage divided by "
+    "the nominal cell voltage, and volumetric efficiency compares the cell volume to the pack envelope."
+)
+
+ANALYSIS_REQUEST = "Analyze this battery pack and predicted cell specs."
+
+
+def analysis_prompt(pack: dict, predictions: dict) -> str:
+    # The specs travel with the request so the model (and later follow-ups) can see them
+    return (
+        f"{ANALYSIS_REQUEST}\n\n"
+        f"**Battery Pack Specs**: length {pack['Length_pack']:g} mm, width {pack['Width_pack']:g} mm, "
+        f"height {pack['Height_pack']:g} mm, energy {pack['Energy']:g} kWh, voltage {pack['Total_Voltage']:g} V\n"
+        f"**Predicted Cell**: length {float(predictions.get('Length_cell', 0)):.0f} mm, "
+        f"width {float(predictions.get('Width_cell', 0)):.0f} mm, "
+        f"height {float(predictions.get('Height_cell', 0)):.0f} mm, "
+        f"power density {float(predictions.get('Power_density', 0)):.2f} Wh/kg"
+    )
+
+
+# Rough per-message framing cost of the chat template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 bytes per token holds for English; CJK characters are 3 bytes and close to one token each
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def load_token_counter(tokenizer_path: str = None):
+    # Prefer the model's own tokenizer.json (e.g. DeepSeek's), then tiktoken, then the byte estimate
+    if tokenizer_path:
+        from tokenizers import Tokenizer
+        tokenizer = Tokenizer.from_file(tokenizer_path)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids)
+    try:
+        import tiktoken
+    except ImportError:
+        return estimate_tokens
+    encoding = tiktoken.get_encoding("cl100k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def _message_bytes(message: dict) -> int:
+    return len(message["role"]) + len(message["content"].encode("utf-8"))
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+|\n+")
+
+
+def _first_sentence(text: str, limit: int = 200) -> str:
+    sentence = _SENTENCE_END.split(text.strip().replace("**", ""), maxsplit=1)[0].strip()
+    return sentence if len(sentence) <= limit else f"{sentence[:limit].rstrip()}…"
+
+
+async def extractive_summary(previous: str, messages: list) -> str:
+    # Cheap local digest: the earlier summary plus the opening sentence of each compacted message
+    lines = [previous] if previous else []
+    for message in messages:
+        speaker = "User" if message["role"] == "user" else "Assistant"
+        lines.append(f"- {speaker}: {_first_sentence(message['content'])}")
+    return "\n".join(lines)
+
+
+# Live histories, so the largest one can be read at scrape time without a per-session series
+_LIVE_HISTORIES = weakref.WeakSet()
+HISTORY_MAX_SESSION_BYTES.set_function(lambda: max((history._bytes for history in _LIVE_HISTORIES), default=0))
+
+
+# 🔁 Per-session chat memory for DeepSeek follow-ups
+#
+# Prompt layout: static system prompt + domain context, pinned summary of compacted turns,
+# latest prediction specs (verbatim), then the recent turns. Between compactions and
+# evictions the list is append-only, so consecutive requests share a cacheable prefix;
+# evictions drop down to a low watermark at once instead of sliding by one turn per request.
+
+class ChatHistory:
+    def __init__(self, session_id: str, max_messages: int = 20, max_tokens: int = 6000,
+                 system_prompt: str = SYSTEM_PROMPT, count_tokens=estimate_tokens,
+                 compact_tokens: int = None, keep_recent: int = 4, evict_to: float = 0.5,
+                 domain_context: str = DOMAIN_CONTEXT):
+        if keep_recent < 1:
+            raise ValueError("keep_recent must be at least 1")
+        self.session_id = session_id
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.compact_tokens = compact_tokens
+        self.keep_recent = keep_recent
+        self.evict_to = evict_to
+        prefix = f"{system_prompt}\n\n{domain_context}" if domain_context else system_prompt
+        self.system = {"role": "system", "content": prefix}
+        self.summary = None
+        self.prediction = None
+        self.pinned = []
+        self.turns = []
+        self._count = functools.lru_cache(maxsize=256)(count_tokens)
+        self._bytes = 0
+        self._publish()
+        _LIVE_HISTORIES.add(self)
+
+    @property
+    def tokens(self) -> int:
+        return sum(self._count(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in self.messages())
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def messages(self) -> list:
+        return [self.system, *self.pinned, *self.turns]
+
+    def append(self, role: str, content: str, prediction: bool = False):
+        message = {"role": role, "content": content}
+        self.turns.append(message)
+        if prediction:
+            self.prediction = message
+        self._evict()
+        self._publish()
+
+    def needs_compaction(self) -> bool:
+        return bool(self.compact_tokens) and len(self.turns) > self.keep_recent and self.tokens > self.compact_tokens
+
+    async def compact(self, summarize=extractive_summary) -> bool:
+        # Folds everything but the most recent turns into the pinned summary
+        if not self.needs_compaction():
+            return False
+
+        split = len(self.turns) - self.keep_recent
+        while split > 0 and self.turns[split]["role"] != "user":
+            split -= 1
+        if split == 0:
+            return False
+
+        older, recent = self.turns[:split], self.turns[split:]
+        previous = self.summary["content"][len(SUMMARY_HEADER):].strip() if self.summary else None
+        digest = await summarize(previous, [message for message in older if message is not self.prediction])
+        self.summary = {"role": "system", "content": f"{SUMMARY_HEADER}\n{digest}"}
+        self.turns = recent
+        self._repin()
+        HISTORY_COMPACTIONS.inc()
+        self._publish()
+        return True
+
+    def close(self):
+        if self in _LIVE_HISTORIES:
+            _LIVE_HISTORIES.discard(self)
+            HISTORY_SESSION_BYTES.observe(self._bytes)
+        HISTORY_TOTAL_BYTES.dec(self._bytes)
+        self.turns = []
+        self.summary = self.prediction = None
+        self.pinned = []
+        self._bytes = 0
+
+    def _publish(self):
+        size = sum(_message_bytes(message) for message in self.messages())
+        HISTORY_TOTAL_BYTES.inc(size - self._bytes)
+        self._bytes = size
+
+    def _repin(self):
+        # Only called when the prefix is being rewritten anyway (compaction or eviction)
+        self.pinned = [message for message in (self.summary, self.prediction)
+                       if message is not None and not any(message is turn for turn in self.turns)]
+
+    def _over(self, messages: int, tokens: int) -> bool:
+        return len(self.turns) + len(self.pinned) + 1 > messages or self.tokens > tokens
+
+    def _evict(self):
+        # Drop whole turns (a user message and the replies after it) from the front, down to the low
+        # watermark in one go; the prefix, pinned context and the newest turn always stay
+        if not self._over(self.max_messages, self.max_tokens):
+            return
+        low_messages = max(2, int(self.max_messages * self.evict_to))
+        low_tokens = int(self.max_tokens * self.evict_to)
+        while self._over(low_messages, low_tokens):
+            end = 1
+            while end < len(self.turns) and self.turns[end]["role"] != "user":
+                end += 1
+            if end >= len(self.turns):
+                break
+            del self.turns[:end]
+            self._repin()
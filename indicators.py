@@ -0,0 +1,85 @@
+import asyncio
+import contextvars
+
+
+# ⏳ "Thinking" indicators for all sessions driven by one shared ticker task
+#
+# A message is only re-sent when its text changes (a status update, or the next
+# frame when animation is on), so idle waits cost no websocket traffic. Chainlit
+# routes a message through the session in the current context, so each update runs
+# in the context of the handler that showed the indicator.
+
+class ThinkingIndicator:
+    def __init__(self, ticker, message, text: str):
+        self.ticker = ticker
+        self.message = message
+        self.text = text
+        self.rendered = text
+        self.context = contextvars.copy_context()
+
+    def set_text(self, text: str):
+        if text != self.text:
+            self.text = text
+            self.ticker.wake()
+
+    async def finish(self, content: str = None):
+        # Removes the indicator, or turns it into a final message such as an error
+        self.ticker.discard(self)
+        if content is None:
+            await self.message.remove()
+        else:
+            self.message.content = content
+            await self.message.update()
+
+
+class ThinkingTicker:
+    def __init__(self, interval: float = 1.0, animate: bool = False):
+        self.interval = interval
+        self.animate = animate
+        self._active = set()
+        self._changed = asyncio.Event()
+        self._task = None
+        self._frame = 0
+
+    def __len__(self):
+        return len(self._active)
+
+    async def show(self, message, text: str) -> ThinkingIndicator:
+        message.content = text
+        await message.send()
+        indicator = ThinkingIndicator(self, message, text)
+        self._active.add(indicator)
+        if self._task is None or self._task.done():
+            # Started from an empty context so the ticker is not tied to whichever session came first
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+        return indicator
+
+    def wake(self):
+        self._changed.set()
+
+    def discard(self, indicator: ThinkingIndicator):
+        self._active.discard(indicator)
+        self._changed.set()
+
+    def _render(self, indicator: ThinkingIndicator) -> str:
+        if not self.animate:
+            return indicator.text
+        return f"{indicator.text}{'.' * (self._frame % 4)}"
+
+    async def _run(self):
+        while self._active:
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.interval if self.animate else None)
+            except asyncio.TimeoutError:
+                self._frame += 1
+            self._changed.clear()
+
+            updates = []
+            for indicator in list(self._active):
+                content = self._render(indicator)
+                if content != indicator.rendered:
+                    indicator.rendered = content
+                    indicator.message.content = content
+                    updates.append(indicator.context.run(asyncio.create_task, indicator.message.update()))
+            if updates:
+                await asyncio.gather(*updates, return_exceptions=True)
@@ -0,0 +1,176 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from metrics import DEEPSEEK_QUEUE_DEPTH, DEEPSEEK_QUEUE_WAIT_SECONDS
+
+# 🚦 Process-wide limits on outbound DeepSeek calls
+#
+# Requests and tokens per minute are token buckets; waiting calls are queued per session
+# and served round-robin, so one chatty user can't starve everyone else.
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, amount: float) -> float:
+        # Seconds until `amount` is available; requests larger than the bucket wait for a full one
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        # May go negative, e.g. when actual usage exceeded the reservation
+        self._refill()
+        self.level -= amount
+
+
+class _Waiter:
+    __slots__ = ("session", "tokens", "future", "on_position", "position")
+
+    def __init__(self, session, tokens: float, on_position):
+        self.session = session
+        self.tokens = tokens
+        self.future = asyncio.get_running_loop().create_future()
+        self.on_position = on_position
+        self.position = None
+
+
+class FairLimiter:
+    def __init__(self, max_concurrency: int = 100, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 position_interval: float = 0.25):
+        # A limit of 0 disables that bucket; queue positions are published at most once per position_interval
+        self.max_concurrency = max_concurrency
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.position_interval = position_interval
+        self.active = 0
+        self._queues = OrderedDict()  # session -> deque of waiters, in round-robin order
+        self._waiting = 0
+        self._freed = asyncio.Event()
+        self._task = None
+        self._positions_due = None
+        self._positions_at = float("-inf")
+
+    def __len__(self):
+        return self._waiting
+
+    def adjust_tokens(self, delta: float):
+        # Settle a reservation against the usage DeepSeek actually reported
+        if self.tokens is not None and delta:
+            self.tokens.take(delta)
+
+    @asynccontextmanager
+    async def slot(self, session="default", tokens: float = 0, on_position=None):
+        # on_position(ahead) is called whenever the number of queued calls ahead of this one changes
+        if not self._queues and self._ready(tokens) == 0:
+            self._grant(tokens)
+        else:
+            waiter = _Waiter(session, tokens, on_position)
+            self._queues.setdefault(session, deque()).append(waiter)
+            self._waiting += 1
+            queued = time.perf_counter()
+            self._changed()
+            if self._task is None or self._task.done():
+                self._task = asyncio.create_task(self._pump())
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.cancelled():
+                    self._remove(waiter)
+                else:
+                    self._release()  # granted just as we were cancelled
+                raise
+            DEEPSEEK_QUEUE_WAIT_SECONDS.observe(time.perf_counter() - queued)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _ready(self, tokens: float) -> float:
+        # 0 when a call may start now, otherwise seconds to wait (inf while all slots are busy)
+        if self.active >= self.max_concurrency:
+            return float("inf")
+        delay = self.requests.delay(1) if self.requests is not None else 0.0
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.delay(tokens))
+        return delay
+
+    def _grant(self, tokens: float):
+        self.active += 1
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+    def _release(self):
+        self.active -= 1
+        self._freed.set()
+
+    def _remove(self, waiter: _Waiter):
+        waiters = self._queues.get(waiter.session)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self._waiting -= 1
+            if not waiters:
+                del self._queues[waiter.session]
+            self._changed()
+            self._freed.set()
+
+    def _changed(self):
+        # Queue changes arrive with every enqueue and grant; positions are recomputed on a timer instead,
+        # so a burst of thousands of waiters costs one pass per interval rather than one per event
+        DEEPSEEK_QUEUE_DEPTH.set(self._waiting)
+        if self._positions_due is None:
+            delay = max(0.0, self._positions_at + self.position_interval - time.monotonic())
+            self._positions_due = asyncio.get_running_loop().call_later(delay, self._publish_positions)
+
+    def _publish_positions(self):
+        # One linear pass in dispatch order: round k serves the k-th call of every session that has one
+        self._positions_due = None
+        self._positions_at = time.monotonic()
+        ahead, k = 0, 0
+        rounds = list(self._queues.values())
+        while rounds:
+            for waiters in rounds:
+                waiter = waiters[k]
+                if waiter.on_position is not None and ahead != waiter.position:
+                    waiter.position = ahead
+                    waiter.on_position(ahead)
+                ahead += 1
+            k += 1
+            rounds = [waiters for waiters in rounds if len(waiters) > k]
+
+    async def _pump(self):
+        while self._queues:
+            session, waiters = next(iter(self._queues.items()))
+            waiter = waiters[0]
+            delay = self._ready(waiter.tokens)
+            if delay:
+                self._freed.clear()
+                try:
+                    await asyncio.wait_for(self._freed.wait(), None if delay == float("inf") else delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            waiters.popleft()
+            self._waiting -= 1
+            # Served sessions go to the back of the line
+            del self._queues[session]
+            if waiters:
+                self._queues[session] = waiters
+            if not waiter.future.done():
+                self._grant(waiter.tokens)
+                waiter.future.set_result(None)
+            self._changed()
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+
+from predictor import PACK_FIELDS, PREDICTION_FIELDS, PredictorError
+
+# 🧮 In-process inference for the battery-size model
+#
+# Weights are exported as an .npz archive holding a plain feed-forward stack
+# (convolutions over the five inputs unroll into dense layers):
+#   layer0_weight (5, h0), layer0_bias (h0,), ..., layerN_weight (hN, 4), layerN_bias (4,)
+#   activation   "relu" | "tanh" | "gelu"     applied between layers, default relu
+#   input_mean, input_std     (5,)  optional standardization of PACK_FIELDS
+#   output_mean, output_std   (4,)  optional de-standardization of PREDICTION_FIELDS
+# An .onnx file with a (batch, 5) -> (batch, 4) graph is served through onnxruntime instead.
+
+_ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0, out=x),
+    "tanh": lambda x: np.tanh(x, out=x),
+    "gelu": lambda x: 0.5 * x * (1 + np.tanh(0.7978845608 * (x + 0.044715 * x ** 3))),
+}
+
+
+def save_weights(path: str, layers: list, activation: str = "relu", input_mean=None, input_std=None,
+                 output_mean=None, output_std=None):
+    # layers: [(weight, bias), ...] with weight shaped (inputs, outputs)
+    arrays = {"activation": np.array(activation)}
+    for i, (weight, bias) in enumerate(layers):
+        arrays[f"layer{i}_weight"] = np.asarray(weight, dtype=np.float32)
+        arrays[f"layer{i}_bias"] = np.asarray(bias, dtype=np.float32)
+    for name, value in (("input_mean", input_mean), ("input_std", input_std),
+                        ("output_mean", output_mean), ("output_std", output_std)):
+        if value is not None:
+            arrays[name] = np.asarray(value, dtype=np.float32)
+    np.savez(path, **arrays)
+
+
+class LocalPredictor:
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.splitext(path)[1].lower() == ".onnx":
+            self._load_onnx(path)
+        else:
+            self._load_npz(path)
+
+    def predict_array(self, packs: np.ndarray) -> np.ndarray:
+        # (n, 5) pack inputs in PACK_FIELDS order -> (n, 4) predictions in PREDICTION_FIELDS order
+        x = np.asarray(packs, dtype=np.float32)
+        if x.ndim != 2 or x.shape[1] != len(PACK_FIELDS):
+            raise ValueError(f"Expected an (n, {len(PACK_FIELDS)}) array, got {x.shape}")
+        return self._forward(x)
+
+    async def predict(self, inputs: dict) -> dict:
+        return self._to_response(self.predict_array(self._to_array([inputs]))[0])
+
+    async def predict_batch(self, batch: list) -> list:
+        return [self._to_response(row) for row in self.predict_array(self._to_array(batch))]
+
+    @staticmethod
+    def _to_array(batch: list) -> np.ndarray:
+        try:
+            return np.array([[float(inputs[field]) for field in PACK_FIELDS] for inputs in batch], dtype=np.float32)
+        except (KeyError, TypeError, ValueError) as err:
+            raise PredictorError(f"Invalid pack inputs: {err}") from err
+
+    @staticmethod
+    def _to_response(row: np.ndarray) -> dict:
+        return {"predictions": {field: float(value) for field, value in zip(PREDICTION_FIELDS, row)}}
+
+    def _load_npz(self, path: str):
+        with np.load(path) as archive:
+            self.layers = []
+            while f"layer{len(self.layers)}_weight" in archive:
+                i = len(self.layers)
+                self.layers.append((archive[f"layer{i}_weight"].astype(np.float32),
+                                    archive[f"layer{i}_bias"].astype(np.float32)))
+            if not self.layers:
+                raise ValueError(f"{path} holds no layer0_weight")
+            activation = str(archive["activation"]) if "activation" in archive else "relu"
+            self.input_mean = archive["input_mean"] if "input_mean" in archive else np.zeros(len(PACK_FIELDS), np.float32)
+            self.input_std = archive["input_std"] if "input_std" in archive else np.ones(len(PACK_FIELDS), np.float32)
+            self.output_mean = archive["output_mean"] if "output_mean" in archive else np.zeros(len(PREDICTION_FIELDS), np.float32)
+            self.output_std = archive["output_std"] if "output_std" in archive else np.ones(len(PREDICTION_FIELDS), np.float32)
+        self.activation = _ACTIVATIONS[activation]
+        self._forward = self._forward_numpy
+
+    def _forward_numpy(self, x: np.ndarray) -> np.ndarray:
+        h = (x - self.input_mean) / self.input_std
+        last = len(self.layers) - 1
+        for i, (weight, bias) in enumerate(self.layers):
+            h = h @ weight
+            h += bias
+            if i != last:
+                h = self.activation(h)
+        return h * self.output_std + self.output_mean
+
+    def _load_onnx(self, path: str):
+        try:
+            import onnxruntime
+        except ImportError as err:
+            raise ImportError("ONNX weights need the 'onnxruntime' package") from err
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = 1  # tiny graph: threading costs more than it saves
+        self._session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self._input_name = self._session.get_inputs()[0].name
+        self._forward = lambda x: self._session.run(None, {self._input_name: x})[0]
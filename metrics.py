@@ -0,0 +1,224 @@
+import asyncio
+import hmac
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# 📊 Process-wide metrics, served on Chainlit's web server by mount_metrics()
+
+MESSAGES_HANDLED = Counter(
+    "gotiongpt_messages_total",
+    "Chat messages handled, by path (prediction, follow_up, bulk, sweep, optimize, throttled, error)",
+    ["path"],
+)
+MESSAGE_SECONDS = Histogram(
+    "gotiongpt_message_seconds",
+    "Time to fully handle a chat message, by path",
+    ["path"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120),
+)
+PARSE_INPUTS = Counter(
+    "gotiongpt_parse_inputs_total",
+    "Messages run through parse_input, by whether they held a complete pack",
+    ["result"],
+)
+ACTIVE_SESSIONS = Gauge(
+    "gotiongpt_active_sessions",
+    "Chat sessions currently connected",
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "gotiongpt_event_loop_lag_seconds",
+    "How late the event loop woke a periodic timer; high values mean blocking work on the loop",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+# Aggregates only: a per-session label would be unbounded and would publish live session ids
+HISTORY_SESSION_BYTES = Histogram(
+    "gotiongpt_history_session_bytes",
+    "Size of a session's chat history when the session ends",
+    buckets=(1024, 4096, 8192, 16384, 32768, 65536, 131072, 262144, 524288, 1048576),
+)
+HISTORY_MAX_SESSION_BYTES = Gauge(
+    "gotiongpt_history_max_session_bytes",
+    "Size of the largest chat history currently kept for a session",
+)
+HISTORY_TOTAL_BYTES = Gauge(
+    "gotiongpt_history_total_bytes",
+    "Size of the chat history kept across all sessions",
+)
+
+HISTORY_COMPACTIONS = Counter(
+    "gotiongpt_history_compactions_total",
+    "Times a session's older turns were folded into its pinned summary",
+)
+HISTORY_PROMPT_TOKENS = Histogram(
+    "gotiongpt_history_prompt_tokens",
+    "Locally counted prompt tokens per DeepSeek request",
+    buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000),
+)
+
+DEEPSEEK_TTFT_SECONDS = Histogram(
+    "gotiongpt_deepseek_ttft_seconds",
+    "Time from sending a streamed DeepSeek request to its first content token",
+    buckets=(0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 20),
+)
+DEEPSEEK_GENERATION_SECONDS = Histogram(
+    "gotiongpt_deepseek_generation_seconds",
+    "Total time to generate a streamed DeepSeek answer",
+    buckets=(0.5, 1, 2, 3, 5, 8, 13, 20, 30, 60),
+)
+
+DEEPSEEK_REQUEST_SECONDS = Histogram(
+    "gotiongpt_deepseek_request_seconds",
+    "Latency of non-streamed DeepSeek completions (e.g. history summaries)",
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+DEEPSEEK_ERRORS = Counter(
+    "gotiongpt_deepseek_errors_total",
+    "Failed DeepSeek calls by exception type",
+    ["error"],
+)
+DEEPSEEK_PROMPT_TOKENS = Counter(
+    "gotiongpt_deepseek_prompt_tokens_total",
+    "Prompt tokens billed by DeepSeek, split by context-cache hit or miss",
+    ["deployment", "cache"],
+)
+DEEPSEEK_COMPLETION_TOKENS = Counter(
+    "gotiongpt_deepseek_completion_tokens_total",
+    "Completion tokens generated by DeepSeek",
+    ["deployment"],
+)
+
+PREDICTION_CACHE_HITS = Counter(
+    "gotiongpt_prediction_cache_hits_total",
+    "Predictions served from the local cache",
+)
+PREDICTION_CACHE_MISSES = Counter(
+    "gotiongpt_prediction_cache_misses_total",
+    "Prediction cache lookups that had to call the predictor",
+)
+PREDICTION_CACHE_EVICTIONS = Counter(
+    "gotiongpt_prediction_cache_evictions_total",
+    "Entries dropped from the prediction cache",
+    ["reason"],
+)
+
+PREDICTOR_REQUEST_SECONDS = Histogram(
+    "gotiongpt_predictor_request_seconds",
+    "Latency of single HTTP attempts against the predictor",
+    ["endpoint"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+PREDICTOR_RESPONSES = Counter(
+    "gotiongpt_predictor_responses_total",
+    "Predictor HTTP attempts by status code (\"transport\" when no response arrived)",
+    ["endpoint", "status"],
+)
+
+PREDICTOR_UP = Gauge(
+    "gotiongpt_predictor_up",
+    "Whether the last warm-up ping to the predictor succeeded",
+)
+PREDICTOR_PING_SECONDS = Histogram(
+    "gotiongpt_predictor_ping_seconds",
+    "Latency of warm-up pings to the predictor",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60, 120),
+)
+PREDICTOR_COLD_STARTS = Counter(
+    "gotiongpt_predictor_cold_starts_total",
+    "Warm-up pings that found the predictor asleep",
+)
+PREDICTOR_WARMUP_SECONDS = Histogram(
+    "gotiongpt_predictor_warmup_seconds",
+    "Time for a cold predictor to answer its first ping",
+    buckets=(5, 10, 20, 30, 45, 60, 90, 120),
+)
+
+PREDICTOR_RETRIES = Counter(
+    "gotiongpt_predictor_retries_total",
+    "Predictor calls retried after a transient failure",
+    ["reason"],
+)
+CIRCUIT_STATE = Gauge(
+    "gotiongpt_circuit_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["circuit"],
+)
+CIRCUIT_TRANSITIONS = Counter(
+    "gotiongpt_circuit_transitions_total",
+    "Circuit breaker state changes",
+    ["circuit", "state"],
+)
+
+PREDICTOR_HEDGES = Counter(
+    "gotiongpt_predictor_hedges_total",
+    "Hedged predictor requests by outcome (fired, won, skipped_budget)",
+    ["outcome"],
+)
+
+TIME_TO_PREDICTION_SECONDS = Histogram(
+    "gotiongpt_time_to_prediction_seconds",
+    "Time from receiving a pack message to showing the predicted cell dimensions",
+    ["analysis_mode", "cache"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "gotiongpt_semantic_cache_lookups_total",
+    "Follow-up questions checked against the semantic answer cache",
+    ["result"],
+)
+SEMANTIC_CACHE_EVICTIONS = Counter(
+    "gotiongpt_semantic_cache_evictions_total",
+    "Answers dropped from the semantic cache to make room",
+)
+SEMANTIC_CACHE_ENTRIES = Gauge(
+    "gotiongpt_semantic_cache_entries",
+    "Answers currently held by the semantic cache",
+)
+
+DEEPSEEK_QUEUE_DEPTH = Gauge(
+    "gotiongpt_deepseek_queue_depth",
+    "DeepSeek calls waiting for a concurrency slot or rate-limit budget",
+)
+DEEPSEEK_QUEUE_WAIT_SECONDS = Histogram(
+    "gotiongpt_deepseek_queue_wait_seconds",
+    "Time DeepSeek calls spent queued before being sent",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60),
+)
+
+THROTTLED_MESSAGES = Counter(
+    "gotiongpt_throttled_messages_total",
+    "Messages rejected by the per-client rate limit",
+    ["scope"],
+)
+
+
+def _metrics_endpoint(token: str = None):
+    async def endpoint(request):
+        from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+        from starlette.responses import Response
+
+        if token and not hmac.compare_digest(request.headers.get("authorization", ""), f"Bearer {token}"):
+            return Response("Unauthorized", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+    return endpoint
+
+
+def mount_metrics(app, path: str = "/metrics", token: str = None):
+    # Goes in front of Chainlit's catch-all frontend route, which would otherwise answer first. A plain
+    # request handler rather than a Mount: a Mount only matches "/metrics/...", so the catch-all would
+    # still serve the frontend for "/metrics" itself. With a token, scrapers must send it as a bearer token
+    from starlette.routing import Route
+
+    if any(getattr(route, "path", None) == path for route in app.router.routes):
+        return  # already mounted, e.g. after a `chainlit run -w` reload
+    app.router.routes.insert(0, Route(path, endpoint=_metrics_endpoint(token), methods=["GET"]))
+
+
+async def watch_event_loop_lag(interval: float = 0.5):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - start - interval))
@@ -0,0 +1,264 @@
+import math
+import re
+
+import numpy as np
+
+from predictor import PACK_FIELDS, PREDICTION_FIELDS
+from sweep import cell_volume, parse_sweep
+
+# 🎯 Inverse design: find pack inputs whose predicted cell meets constraints and optimizes a target
+#
+#   /optimize length=800:2000 width=600:1800 height=100:300 energy=60 voltage=400 cell_length<300
+#   /optimize length=800:2000 width=600:1800 height=100:1600 energy=40:90 voltage=400:800 minimize=cell_volume power_density>=180 budget=40
+#
+# The predictor is a black box that is expensive to call, so it is modelled by Gaussian-process
+# surrogates fitted to the evaluations so far. Each round evaluates the few candidates with the
+# highest constrained expected improvement (EI × probability of meeting every constraint).
+
+OUTPUTS = {
+    "cell_length": "Length_cell",
+    "cell_width": "Width_cell",
+    "cell_height": "Height_cell",
+    "power_density": "Power_density",
+    "cell_volume": "Cell_volume",
+    **{field.lower(): field for field in PREDICTION_FIELDS},
+}
+OUTPUT_UNITS = {"Length_cell": "mm", "Width_cell": "mm", "Height_cell": "mm", "Power_density": "Wh/kg",
+                "Cell_volume": "L"}
+_GOAL = re.compile(r"\b(maximize|minimize)\s*=\s*(\w+)", re.I)
+_CONSTRAINT = re.compile(r"\b(\w+)\s*(<=|>=|<|>)\s*(\d+(?:\.\d+)?)")
+_BUDGET = re.compile(r"\bbudget\s*=\s*(\d+)", re.I)
+
+
+class OptimizeError(ValueError):
+    pass
+
+
+def outputs(predictions: np.ndarray) -> dict:
+    # Named output columns, including the derived cell volume
+    columns = {field: predictions[:, i] for i, field in enumerate(PREDICTION_FIELDS)}
+    columns["Cell_volume"] = cell_volume(predictions)
+    return columns
+
+
+def _output(name: str) -> str:
+    field = OUTPUTS.get(name.lower())
+    if field is None:
+        raise OptimizeError(f"Unknown output '{name}'; use cell_length, cell_width, cell_height, "
+                            f"power_density or cell_volume")
+    return field
+
+
+class Problem:
+    def __init__(self, ranges: dict, objective: str = "Power_density", maximize: bool = True,
+                 constraints: list = (), budget: int = 60):
+        self.ranges = ranges
+        self.objective = objective
+        self.maximize = maximize
+        self.constraints = list(constraints)  # [(output, "<" | "<=" | ">" | ">=", value)]
+        self.budget = budget
+        self.lo = np.array([ranges[field][0] for field in PACK_FIELDS], dtype=np.float64)
+        self.hi = np.array([ranges[field][1] for field in PACK_FIELDS], dtype=np.float64)
+        self.free = self.hi > self.lo
+
+    @classmethod
+    def parse(cls, text: str, default_budget: int = 60) -> "Problem":
+        goal = _GOAL.search(text)
+        objective, maximize = "Power_density", True
+        if goal:
+            objective, maximize = _output(goal.group(2)), goal.group(1).lower() == "maximize"
+        constraints = [(_output(name), op, float(value)) for name, op, value in _CONSTRAINT.findall(text)]
+        budget = _BUDGET.search(text)
+        rest = _BUDGET.sub(" ", _CONSTRAINT.sub(" ", _GOAL.sub(" ", text)))
+        problem = cls(parse_sweep(rest)["ranges"], objective, maximize, constraints,
+                      int(budget.group(1)) if budget else default_budget)
+        if not problem.free.any():
+            raise OptimizeError("Give at least one pack field a lo:hi range to optimize over")
+        return problem
+
+    def to_points(self, unit: np.ndarray) -> np.ndarray:
+        # Unit-cube coordinates of the free fields -> full (n, 5) pack inputs
+        points = np.tile(self.lo, (len(unit), 1))
+        points[:, self.free] = self.lo[self.free] + unit * (self.hi - self.lo)[self.free]
+        return points.astype(np.float32)
+
+    def score(self, columns: dict) -> tuple:
+        # (objective to maximize, feasible mask)
+        objective = columns[self.objective] if self.maximize else -columns[self.objective]
+        feasible = np.isfinite(objective)
+        for output, op, value in self.constraints:
+            column = columns[output]
+            feasible &= {"<": column < value, "<=": column <= value, ">": column > value, ">=": column >= value}[op]
+        return objective, feasible
+
+    def describe(self) -> str:
+        goal = f"{'maximize' if self.maximize else 'minimize'} {self.objective}"
+        if self.constraints:
+            goal += " subject to " + ", ".join(f"{output} {op} {value:g}" for output, op, value in self.constraints)
+        return goal
+
+
+# 📈 Gaussian-process surrogate (squared-exponential kernel on the unit cube)
+
+_normal_cdf = np.vectorize(lambda z: 0.5 * (1 + math.erf(z / math.sqrt(2))), otypes=[float])
+
+
+def _normal_pdf(z):
+    return np.exp(-0.5 * z ** 2) / math.sqrt(2 * math.pi)
+
+
+class GaussianProcess:
+    LENGTHSCALES = (0.05, 0.1, 0.2, 0.35, 0.6, 1.0)
+
+    def __init__(self, noise: float = 1e-6):
+        self.noise = noise
+
+    @staticmethod
+    def _kernel(a: np.ndarray, b: np.ndarray, lengthscale: float) -> np.ndarray:
+        d2 = np.sum(a ** 2, 1)[:, None] + np.sum(b ** 2, 1)[None, :] - 2 * a @ b.T
+        return np.exp(-0.5 * np.maximum(d2, 0) / lengthscale ** 2)
+
+    def fit(self, x: np.ndarray, y: np.ndarray) -> "GaussianProcess":
+        self.x = x
+        self.mean = y.mean()
+        self.scale = y.std() or 1.0
+        z = (y - self.mean) / self.scale
+        # Lengthscale by marginal likelihood over a small grid: cheap, and robust for tens of points
+        best = None
+        for lengthscale in self.LENGTHSCALES:
+            k = self._kernel(x, x, lengthscale) + (self.noise + 1e-8) * np.eye(len(x))
+            try:
+                chol = np.linalg.cholesky(k)
+            except np.linalg.LinAlgError:
+                continue
+            alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, z))
+            log_likelihood = -0.5 * z @ alpha - np.log(np.diag(chol)).sum()
+            if best is None or log_likelihood > best[0]:
+                best = (log_likelihood, lengthscale, chol, alpha)
+        if best is None:
+            raise np.linalg.LinAlgError("Surrogate covariance is not positive definite")
+        _, self.lengthscale, self._chol, self._alpha = best
+        return self
+
+    def predict(self, x: np.ndarray) -> tuple:
+        k = self._kernel(x, self.x, self.lengthscale)
+        mean = k @ self._alpha
+        v = np.linalg.solve(self._chol, k.T)
+        std = np.sqrt(np.maximum(1.0 - np.sum(v ** 2, 0), 1e-12))
+        return mean * self.scale + self.mean, std * self.scale
+
+
+def _feasibility(problem: Problem, models: dict, candidates: np.ndarray) -> np.ndarray:
+    probability = np.ones(len(candidates))
+    for output, op, value in problem.constraints:
+        mean, std = models[output].predict(candidates)
+        z = (value - mean) / std if op in ("<", "<=") else (mean - value) / std
+        probability *= _normal_cdf(z)
+    return probability
+
+
+def _pick(candidates: np.ndarray, acquisition: np.ndarray, k: int, min_distance: float) -> np.ndarray:
+    # Top-k candidates by acquisition, kept apart so one round doesn't spend its batch on one spot
+    chosen = []
+    for i in np.argsort(-acquisition):
+        if all(np.linalg.norm(candidates[i] - candidates[j]) >= min_distance for j in chosen):
+            chosen.append(i)
+            if len(chosen) == k:
+                break
+    return candidates[chosen]
+
+
+async def optimize(problem: Problem, evaluate, initial: int = None, batch: int = 4, candidates: int = 4096,
+                   seed: int = None, on_progress=None) -> dict:
+    # evaluate: async (n, 5) packs -> (n, 4) predictions. Each call is one evaluation round: a single
+    # request with a batch endpoint, one request per point without it, so rounds are not predictor requests
+    rng = np.random.default_rng(seed)
+    dims = int(problem.free.sum())
+    initial = min(problem.budget, initial or max(2 * dims + 2, batch))
+
+    # Space-filling start: one Latin-hypercube stratum per initial point on every free axis
+    strata = rng.permuted(np.tile(np.arange(initial), (dims, 1)), axis=1).T
+    x = (strata + rng.random((initial, dims))) / initial
+    predictions = await evaluate(problem.to_points(x))
+    rounds = 1
+    trace = []
+
+    def best_so_far():
+        objective, feasible = problem.score(outputs(predictions))
+        if not feasible.any():
+            return None, objective, feasible
+        return int(np.flatnonzero(feasible)[np.argmax(objective[feasible])]), objective, feasible
+
+    while True:
+        best, objective, feasible = best_so_far()
+        trace.append((len(x), None if best is None else float(objective[best])))
+        if on_progress is not None:
+            await on_progress(len(x), problem.budget, None if best is None else predictions[best])
+        if len(x) >= problem.budget:
+            break
+
+        valid = np.all(np.isfinite(predictions), axis=1)
+        count = min(batch, problem.budget - len(x))
+        if valid.sum() < 2:
+            # Too few successful predictions to fit a surrogate: keep sampling at random
+            chosen = rng.random((count, dims))
+            x = np.vstack([x, chosen])
+            predictions = np.vstack([predictions, await evaluate(problem.to_points(chosen))])
+            rounds += 1
+            continue
+        columns = outputs(predictions[valid])
+        models = {problem.objective: GaussianProcess().fit(x[valid], problem.score(columns)[0])}
+        for output, _, _ in problem.constraints:
+            if output not in models:
+                models[output] = GaussianProcess().fit(x[valid], columns[output])
+
+        # Candidates: a space-filling sample plus perturbations of the best points seen so far
+        pool = rng.random((candidates, dims))
+        if best is not None:
+            top = x[np.flatnonzero(feasible)[np.argsort(-objective[feasible])[:4]]]
+            local = top[rng.integers(len(top), size=candidates // 2)] + rng.normal(0, 0.05, (candidates // 2, dims))
+            pool = np.vstack([pool, np.clip(local, 0, 1)])
+
+        probability = _feasibility(problem, models, pool)
+        if best is None:
+            acquisition = probability  # nothing feasible yet: look for the feasible region first
+        else:
+            mean, std = models[problem.objective].predict(pool)
+            z = (mean - objective[best]) / std
+            acquisition = ((mean - objective[best]) * _normal_cdf(z) + std * _normal_pdf(z)) * probability
+
+        chosen = _pick(pool, acquisition, count, 0.02 * math.sqrt(dims))
+        x = np.vstack([x, chosen])
+        predictions = np.vstack([predictions, await evaluate(problem.to_points(chosen))])
+        rounds += 1
+
+    best, objective, feasible = best_so_far()
+    points = problem.to_points(x)
+    return {
+        "best_inputs": None if best is None else dict(zip(PACK_FIELDS, map(float, points[best]))),
+        "best_outputs": None if best is None else {name: float(column[best])
+                                                   for name, column in outputs(predictions).items()},
+        "evaluations": len(x),
+        "rounds": rounds,
+        "feasible": int(feasible.sum()),
+        "trace": trace,
+    }
+
+
+def result_markdown(problem: Problem, result: dict, seconds: float) -> str:
+    header = (f"🎯 **Goal:** {problem.describe()}\n\n"
+              f"{result['evaluations']} predictions in {result['rounds']} evaluation rounds, {seconds:.1f} s\n\n")
+    if result["best_inputs"] is None:
+        return header + "❌ No evaluated design met every constraint. Try wider ranges or a bigger budget."
+    inputs = result["best_inputs"]
+    lines = [
+        "**Best pack found**",
+        f"- Length × Width × Height: {inputs['Length_pack']:.0f} × {inputs['Width_pack']:.0f} × "
+        f"{inputs['Height_pack']:.0f} mm",
+        f"- Energy: {inputs['Energy']:.1f} kWh",
+        f"- Total Voltage: {inputs['Total_Voltage']:.0f} V",
+        "",
+        "**Predicted cell**",
+        *(f"- {name.replace('_', ' ')}: {value:.2f} {OUTPUT_UNITS[name]}" for name, value in result["best_outputs"].items()),
+    ]
+    return header + "\n".join(lines)
@@ -0,0 +1,42 @@
+import re
+
+from predictor import PACK_FIELDS
+
+# ✅ Flexible input parser, compiled once at import
+
+_SEPARATORS = str.maketrans({"，": ",", "、": ",", ";": ",", "|": ","})
+
+# One precompiled search per field, in PACK_FIELDS order: each keyword is paired with the first
+# number after it, and a field's search never consumes text another field's keyword could use
+_FIELD_PATTERNS = tuple(
+    (field, re.compile(rf"(?:{keywords})\D*(\d+(?:\.\d+)?)"))
+    for field, keywords in (
+        ("Length_pack", "length|long"),
+        ("Width_pack", "width|wide"),
+        ("Height_pack", "height|tall"),
+        ("Energy", "energy|capacity"),
+        ("Total_Voltage", "voltage"),
+    )
+)
+
+
+def parse_input(text: str):
+    clean_text = text.lower().translate(_SEPARATORS)
+
+    extracted = {}
+    for field, pattern in _FIELD_PATTERNS:
+        match = pattern.search(clean_text)
+        if match is None:
+            break
+        extracted[field] = float(match.group(1))
+    else:
+        return extracted
+
+    try:
+        numbers = [float(x.strip()) for x in clean_text.split(",") if x.strip()]
+        if len(numbers) == 5:
+            return dict(zip(PACK_FIELDS, numbers))
+    except ValueError:
+        pass
+
+    return None
@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import sys
+import time
+
+from bulk import map_ordered
+from parsing import parse_input
+from predictor import API_URL, PACK_FIELDS, PREDICTION_FIELDS, PredictorClient
+from resilience import RetryPolicy
+
+# 🖥️ Offline batch predictions without the web UI
+#
+#   python predict_cli.py sweep.txt -o results.jsonl
+#   python predict_cli.py designs.csv --format csv --url http://localhost:8000/predictions/
+#   generate_designs | python predict_cli.py --backend local --model weights.npz --format parquet -o out.parquet
+#
+# Each input line goes through the chat's parse_input rules; CSV files with the five pack columns
+# and JSONL objects holding them are read directly. Reading, predicting and writing all stream, so
+# memory stays flat however many rows go through.
+
+OUTPUT_FIELDS = ("line", *PACK_FIELDS, *PREDICTION_FIELDS, "error")
+
+
+def _read_lines(f):
+    for number, line in enumerate(f, 1):
+        if line.strip():
+            yield number, parse_input(line)
+
+
+def _read_csv(f):
+    reader = csv.reader(f)
+    first = next(reader, [])
+    header = [name.strip().lower() for name in first]
+    if not all(field.lower() in header for field in PACK_FIELDS):
+        # No pack columns: every row, the first included, is a pack spec in free text
+        if any(value.strip() for value in first):
+            yield 1, parse_input(",".join(first))
+        for number, row in enumerate(reader, 2):
+            if any(value.strip() for value in row):
+                yield number, parse_input(",".join(row))
+        return
+    columns = {field: header.index(field.lower()) for field in PACK_FIELDS}
+    for number, row in enumerate(reader, 2):
+        if not any(value.strip() for value in row):
+            continue
+        try:
+            yield number, {field: float(row[index]) for field, index in columns.items()}
+        except (IndexError, ValueError):
+            yield number, None
+
+
+def _read_jsonl(f):
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None
+            continue
+        if isinstance(record, dict) and all(field in record for field in PACK_FIELDS):
+            try:
+                yield number, {field: float(record[field]) for field in PACK_FIELDS}
+            except (TypeError, ValueError):
+                yield number, None
+        elif isinstance(record, dict):
+            text = record.get("input") or record.get("text")
+            yield number, parse_input(text) if isinstance(text, str) else None
+        else:
+            yield number, parse_input(record) if isinstance(record, str) else None
+
+
+def read_packs(f, input_format: str):
+    # Lazily yields (line number, pack inputs or None when the line could not be parsed)
+    readers = {"text": _read_lines, "csv": _read_csv, "jsonl": _read_jsonl}
+    return readers[input_format](f)
+
+
+def guess_format(path: str, default: str) -> str:
+    suffix = os.path.splitext(path or "")[1].lower()
+    return {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}.get(suffix, default)
+
+
+class JsonLinesWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, record: dict):
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.f.flush()
+
+
+class CsvWriter:
+    def __init__(self, f):
+        self.f = f
+        self.writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record: dict):
+        self.writer.writerow(record)
+
+    def close(self):
+        self.f.flush()
+
+
+class ParquetWriter:
+    # Buffers one row group at a time, so memory is bounded by row_group_size
+    def __init__(self, path: str, row_group_size: int = 65536):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise SystemExit("Parquet output needs the 'pyarrow' package") from err
+        self.pa = pa
+        self.schema = pa.schema(
+            [("line", pa.int64())]
+            + [(field, pa.float64()) for field in (*PACK_FIELDS, *PREDICTION_FIELDS)]
+            + [("error", pa.string())]
+        )
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.row_group_size = row_group_size
+        self.rows = []
+
+    def write(self, record: dict):
+        self.rows.append(record)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if self.rows:
+            self.writer.write_table(self.pa.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+async def _predict_record(predict, item) -> dict:
+    number, inputs = item
+    record = {"line": number, **{field: None for field in OUTPUT_FIELDS[1:]}}
+    if inputs is None:
+        record["error"] = "could not parse pack inputs"
+        return record
+    record.update(inputs)
+    try:
+        predictions = (await predict(inputs)).get("predictions") or {}
+        record.update({field: float(predictions[field]) for field in PREDICTION_FIELDS})
+    except Exception as err:
+        record["error"] = f"{type(err).__name__}: {err}"
+    return record
+
+
+async def run(args) -> dict:
+    input_format = args.input_format or guess_format(args.input, "text")
+    if input_format == "parquet":
+        raise SystemExit("Parquet is an output format; read packs from text, CSV or JSONL")
+    output_format = args.format or guess_format(args.output, "jsonl")
+    if output_format == "parquet" and args.output == "-":
+        raise SystemExit("Parquet output needs a file path (-o)")
+
+    stats = {"rows": 0, "failed": 0, "seconds": 0.0}
+    # Everything opened so far is closed in reverse order, however far setup or the run got
+    async with contextlib.AsyncExitStack() as stack:
+        try:
+            input_file = sys.stdin if args.input == "-" else stack.enter_context(
+                open(args.input, newline="", encoding="utf-8-sig"))
+            if output_format == "parquet":
+                writer = ParquetWriter(args.output)
+            else:
+                output_file = sys.stdout if args.output == "-" else stack.enter_context(
+                    open(args.output, "w", newline="", encoding="utf-8"))
+                writer = (CsvWriter if output_format == "csv" else JsonLinesWriter)(output_file)
+        except OSError as err:
+            raise SystemExit(f"Cannot open {err.filename or 'file'}: {err.strerror or err}") from err
+        stack.callback(writer.close)
+
+        if args.backend == "local":
+            from local_model import LocalPredictor
+            predict = LocalPredictor(args.model).predict
+        else:
+            client = PredictorClient(args.url, retry=RetryPolicy(attempts=args.retries), timeout=args.timeout,
+                                     max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            stack.push_async_callback(client.aclose)
+            predict = client.predict
+
+        start = last_report = time.perf_counter()
+        packs = read_packs(input_file, input_format)
+        async for record in map_ordered(lambda item: _predict_record(predict, item), packs, args.concurrency):
+            writer.write(record)
+            stats["rows"] += 1
+            stats["failed"] += record["error"] is not None
+            now = time.perf_counter()
+            if not args.quiet and now - last_report >= args.progress_every:
+                last_report = now
+                print(f"{stats['rows']} rows, {stats['failed']} failed, {stats['rows'] / (now - start):.0f} rows/s",
+                      file=sys.stderr)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def _at_least_one(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be at least 1")
+    return number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Predict cell dimensions for many battery packs at once.")
+    parser.add_argument("input", nargs="?", default="-", help="text, CSV or JSONL file of pack specs (default stdin)")
+    parser.add_argument("-o", "--output", default="-", help="output file (default stdout)")
+    parser.add_argument("--input-format", choices=("text", "csv", "jsonl"), help="default: from the file suffix")
+    parser.add_argument("--format", choices=("jsonl", "csv", "parquet"), help="default: from the output suffix")
+    parser.add_argument("--backend", choices=("remote", "local"), default=os.getenv("PREDICTOR_BACKEND", "remote"))
+    parser.add_argument("--url", default=os.getenv("PREDICTIONS_URL") or API_URL, help="predictor endpoint")
+    parser.add_argument("--model", default=os.getenv("LOCAL_MODEL_PATH"), help="weights for --backend local")
+    parser.add_argument("--concurrency", type=_at_least_one, default=32, help="predictions in flight")
+    parser.add_argument("--retries", type=_at_least_one, default=3,
+                        help="attempts per pack on transient errors (at least 1)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--progress-every", type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument("-q", "--quiet", action="store_true", help="no progress output")
+    args = parser.parse_args(argv)
+    if args.backend == "local" and not args.model:
+        parser.error("--backend local needs --model or LOCAL_MODEL_PATH")
+
+    stats = asyncio.run(run(args))
+    if not args.quiet:
+        print(f"Done: {stats['rows']} rows ({stats['failed']} failed) in {stats['seconds']:.1f} s", file=sys.stderr)
+    return 1 if stats["rows"] and stats["failed"] == stats["rows"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
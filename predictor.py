@@ -0,0 +1,123 @@
+import importlib.util
+import logging
+import time
+
+import httpx
+
+from metrics import PREDICTOR_REQUEST_SECONDS, PREDICTOR_RESPONSES
+from tracing import span, trace_headers
+
+logger = logging.getLogger(__name__)
+
+# Hosted battery-size predictor (predictions plus a bundled DeepSeek analysis)
+API_URL = "https://battery-size-cnn.onrender.com/predict/"
+
+# Input contract of the battery-size predictor, in the order the model expects
+PACK_FIELDS = ("Length_pack", "Width_pack", "Height_pack", "Energy", "Total_Voltage")
+# Keys of the "predictions" object it returns
+PREDICTION_FIELDS = ("Length_cell", "Width_cell", "Height_cell", "Power_density")
+
+
+class PredictorError(Exception):
+    def __init__(self, message: str, status_code: int = None, body: str = ""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class PredictorStatusError(PredictorError):
+    pass
+
+
+class PredictorDecodeError(PredictorError):
+    pass
+
+
+# ✅ Shared connection pool for the battery-size predictor
+
+def create_http_client(
+    timeout: float = 30.0,
+    max_connections: int = 100,
+    max_keepalive_connections: int = 20,
+    keepalive_expiry: float = 60.0,
+    http2: bool = False,
+) -> httpx.AsyncClient:
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but the 'h2' package is not installed; falling back to HTTP/1.1")
+        http2 = False
+
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive_connections,
+        keepalive_expiry=keepalive_expiry,
+    )
+    return httpx.AsyncClient(timeout=timeout, limits=limits, http2=http2)
+
+
+class PredictorClient:
+    def __init__(self, url: str, batch_url: str = None, retry=None, breaker=None, hedge=None, **pool_options):
+        self.url = url
+        self.batch_url = batch_url or f"{url.rstrip('/')}/batch"
+        self.retry = retry
+        self.breaker = breaker
+        self.hedge = hedge
+        self.pool_options = pool_options
+        self._http = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # Created on first use so the pool binds to the running event loop
+        if self._http is None or self._http.is_closed:
+            self._http = create_http_client(**self.pool_options)
+        return self._http
+
+    async def predict(self, inputs: dict) -> dict:
+        return await self._post(self.url, inputs)
+
+    async def predict_batch(self, batch: list) -> list:
+        # Array payload in, one response object per pack out (bare list or {"results": [...]})
+        data = await self._post(self.batch_url, batch)
+        results = data.get("results") if isinstance(data, dict) else data
+        if not isinstance(results, list) or len(results) != len(batch):
+            raise PredictorDecodeError("Batch response does not match the request", 200, str(data)[:1000])
+        return results
+
+    async def _post(self, url: str, payload):
+        # Breaker outside retries: one logical call is one outcome, however many attempts it took
+        if self.breaker is not None:
+            return await self.breaker.call(self._post_retrying, url, payload)
+        return await self._post_retrying(url, payload)
+
+    async def _post_retrying(self, url: str, payload):
+        if self.retry is not None:
+            return await self.retry.call(self._post_attempt, url, payload)
+        return await self._post_attempt(url, payload)
+
+    async def _post_attempt(self, url: str, payload):
+        if self.hedge is not None:
+            return await self.hedge.call(url, self._post_once, url, payload)
+        return await self._post_once(url, payload)
+
+    async def _post_once(self, url: str, payload):
+        endpoint = "batch" if url == self.batch_url else "predict"
+        with span("predictor.request", {"http.url": url, "predictor.endpoint": endpoint}) as current:
+            start = time.perf_counter()
+            try:
+                res = await self.http.post(url, json=payload, headers=trace_headers())
+            except httpx.HTTPError as err:
+                PREDICTOR_RESPONSES.labels(endpoint, "transport").inc()
+                raise PredictorError(f"{type(err).__name__}: {err}") from err
+            PREDICTOR_REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+            PREDICTOR_RESPONSES.labels(endpoint, str(res.status_code)).inc()
+            current.set_attribute("http.status_code", res.status_code)
+
+        if res.status_code != 200:
+            raise PredictorStatusError(f"HTTP {res.status_code}", res.status_code, res.text)
+        try:
+            return res.json()
+        except ValueError as err:
+            raise PredictorDecodeError(str(err), res.status_code, res.text) from err
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+from metrics import CIRCUIT_STATE, CIRCUIT_TRANSITIONS, PREDICTOR_HEDGES, PREDICTOR_RETRIES
+from predictor import PredictorDecodeError, PredictorError, PredictorStatusError
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitOpenError(PredictorError):
+    pass
+
+
+def is_transient(err: Exception) -> bool:
+    # Worth retrying (and counting against the service): 5xx, 429 and transport failures
+    if isinstance(err, PredictorStatusError):
+        return err.status_code >= 500 or err.status_code == 429
+    if isinstance(err, (PredictorDecodeError, CircuitOpenError)):
+        return False
+    return isinstance(err, PredictorError)
+
+
+# 🔁 Jittered exponential backoff
+
+class RetryPolicy:
+    def __init__(self, attempts: int = 3, base_delay: float = 0.25, max_delay: float = 4.0):
+        self.attempts = max(1, attempts)  # the first try always happens; 0 would make call() return None
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from many sessions instead of synchronizing them
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def call(self, fn, *args):
+        for attempt in range(self.attempts):
+            try:
+                return await fn(*args)
+            except Exception as err:
+                if attempt == self.attempts - 1 or not is_transient(err):
+                    raise
+                reason = f"http_{err.status_code}" if isinstance(err, PredictorStatusError) else "transport"
+                PREDICTOR_RETRIES.labels(reason).inc()
+                delay = self.delay(attempt)
+                logger.info("Predictor call failed (%s); retry %d in %.2fs", err, attempt + 1, delay)
+                await asyncio.sleep(delay)
+
+
+# ⚡ Circuit breaker: fail fast once the error rate crosses a threshold, then probe for recovery
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_rate: float = 0.5, window: int = 20, min_calls: int = 5,
+                 reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probing = False
+        CIRCUIT_STATE.labels(name).set(CIRCUIT_STATES["closed"])
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning("Circuit %s: %s -> %s", self.name, self.state, state)
+        self.state = state
+        CIRCUIT_STATE.labels(self.name).set(CIRCUIT_STATES[state])
+        CIRCUIT_TRANSITIONS.labels(self.name, state).inc()
+
+    def _allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition("half_open")
+        # Half-open lets a single probe through; everything else keeps failing fast
+        if self.state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def _record(self, failed: bool):
+        if self.state == "half_open":
+            self._probing = False
+            if failed:
+                self._opened_at = time.monotonic()
+                self._transition("open")
+            else:
+                self._outcomes.clear()
+                self._transition("closed")
+            return
+
+        self._outcomes.append(failed)
+        if len(self._outcomes) >= self.min_calls and sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+            self._opened_at = time.monotonic()
+            self._transition("open")
+
+    async def call(self, fn, *args):
+        if not self._allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open; the service is failing")
+        try:
+            result = await fn(*args)
+        except asyncio.CancelledError:
+            if self.state == "half_open":
+                self._probing = False
+            raise
+        except Exception as err:
+            self._record(is_transient(err))
+            raise
+        self._record(False)
+        return result
+
+
+# 🏁 Hedged requests: a second identical call once the first is slower than usual
+
+class HedgePolicy:
+    def __init__(self, percentile: float = 95.0, max_extra_ratio: float = 0.05, window: int = 200,
+                 min_samples: int = 20, min_delay: float = 0.01):
+        self.percentile = percentile
+        self.max_extra_ratio = max_extra_ratio
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._window = window
+        self._latencies = {}
+        # Each call earns max_extra_ratio of a hedge, so hedges stay under that share of traffic
+        self._budget = 1.0
+
+    def delay(self, key: str):
+        samples = self._latencies.get(key)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def _record(self, key: str, latency: float):
+        self._latencies.setdefault(key, deque(maxlen=self._window)).append(latency)
+
+    async def _timed(self, key: str, fn, *args, censored: bool = False):
+        start = time.perf_counter()
+        try:
+            result = await fn(*args)
+        except asyncio.CancelledError:
+            # A primary cancelled because its hedge won was at least this slow. Leaving it out would keep
+            # only the fast completions, pulling the percentile (and the hedge delay) down over time.
+            # A cancelled hedge started late, so its elapsed time says nothing about the tail
+            if censored:
+                self._record(key, time.perf_counter() - start)
+            raise
+        self._record(key, time.perf_counter() - start)
+        return result
+
+    async def call(self, key: str, fn, *args):
+        self._budget = min(self._budget + self.max_extra_ratio, 10.0)
+        primary = asyncio.ensure_future(self._timed(key, fn, *args, censored=True))
+        delay = self.delay(key)
+        if delay is None:
+            return await primary
+
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+            if self._budget < 1.0:
+                PREDICTOR_HEDGES.labels("skipped_budget").inc()
+                return await primary
+
+            self._budget -= 1.0
+            PREDICTOR_HEDGES.labels("fired").inc()
+            hedge = asyncio.ensure_future(self._timed(key, fn, *args))
+            try:
+                pending = {primary, hedge}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    # A failed copy only matters if the other one fails too
+                    for task in sorted(done, key=lambda t: t.exception() is not None):
+                        if task.exception() is None or not pending:
+                            if task is hedge and task.exception() is None:
+                                PREDICTOR_HEDGES.labels("won").inc()
+                            return task.result()
+            finally:
+                hedge.cancel()
+        finally:
+            primary.cancel()
@@ -0,0 +1,152 @@
+import asyncio
+import hashlib
+import re
+import time
+
+import numpy as np
+
+from metrics import SEMANTIC_CACHE_ENTRIES, SEMANTIC_CACHE_EVICTIONS, SEMANTIC_CACHE_LOOKUPS
+
+# 🔎 Semantic cache of follow-up answers
+#
+# Questions are embedded on CPU and compared by cosine similarity. Answers depend on the
+# pack being discussed, so a hit also requires the same prediction context. Questions that
+# point back at earlier turns ("why is that so high?") depend on the rest of the conversation
+# too, so callers skip the cache for those (see refers_back).
+
+
+# Function words that carry no meaning for matching; the question words stay, since "why" and "how"
+# questions about the same thing want different answers
+_STOPWORDS = frozenset(
+    "a an the is are was were be been this that these those of to for in on at by and or do does did i we you "
+    "it its my our your so can could should would will there with me please about".split()
+)
+_TOKENS = re.compile(r"\d+(?:\.\d+)?|[^\W\d_]+")
+
+# Words that lean on an earlier turn for their meaning. "this"/"these" usually mean the pack in the
+# prediction context, which is already part of the key, so they stay cacheable
+_BACK_REFERENCES = re.compile(
+    r"\b(?:that|those|it|its|they|them|their|above|previous|previously|earlier|former|latter|same|you said)\b"
+)
+
+
+def refers_back(question: str) -> bool:
+    return _BACK_REFERENCES.search(question.lower()) is not None
+
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+class HashingEmbedder:
+    # Dependency-free fallback: hashed bag of stemmed content words, numbers weighted up (400 V and
+    # 800 V are different questions) and boundary-marked character trigrams weighted down for typos.
+    # Matches rewordings, word-order changes and plurals, not synonyms; use a fastembed model for those.
+    def __init__(self, dim: int = 1024, number_weight: float = 2.0, trigram_weight: float = 0.2):
+        self.dim = dim
+        self.number_weight = number_weight
+        self.trigram_weight = trigram_weight
+
+    def _features(self, text: str):
+        for token in _TOKENS.findall(text.lower()):
+            if token[0].isdigit():
+                yield f"#{token}", self.number_weight
+            elif token not in _STOPWORDS:
+                word = _stem(token)
+                yield word, 1.0
+                marked = f"<{word}>"
+                for i in range(len(marked) - 2):
+                    yield marked[i:i + 3], self.trigram_weight
+
+    def embed(self, texts: list) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vectors[row, digest % self.dim] += weight if digest >> 63 else -weight
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class FastEmbedEmbedder:
+    # Small ONNX sentence-embedding model via fastembed, e.g. BAAI/bge-small-en-v1.5
+    def __init__(self, model_name: str):
+        from fastembed import TextEmbedding
+        self._model = TextEmbedding(model_name=model_name)
+
+    def embed(self, texts: list) -> np.ndarray:
+        vectors = np.array(list(self._model.embed(texts)), dtype=np.float32)
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def load_embedder(model_name: str = "hashing"):
+    if not model_name or model_name == "hashing":
+        return HashingEmbedder()
+    return FastEmbedEmbedder(model_name)
+
+
+class SemanticCache:
+    def __init__(self, embedder=None, threshold: float = 0.9, max_entries: int = 2048, ttl: float = 7 * 24 * 3600):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._vectors = None
+        self._contexts = np.zeros(max_entries, dtype=np.uint64)
+        self._last_used = np.full(max_entries, -np.inf)
+        self._stored_at = np.zeros(max_entries)
+        self._answers = [None] * max_entries
+        self._size = 0
+
+    @staticmethod
+    def _context_key(context: str) -> int:
+        return int.from_bytes(hashlib.blake2b((context or "").encode(), digest_size=8).digest(), "little")
+
+    async def _embed(self, text: str) -> np.ndarray:
+        if isinstance(self.embedder, HashingEmbedder):
+            return self.embedder.embed([text])[0]
+        return (await asyncio.to_thread(self.embedder.embed, [text]))[0]
+
+    async def lookup(self, question: str, context: str = ""):
+        # Returns (answer, embedding); pass the embedding back to store() on a miss to avoid re-embedding
+        vector = await self._embed(question)
+        if self._size:
+            now = time.time()
+            live = self._contexts[:self._size] == self._context_key(context)
+            live &= now - self._stored_at[:self._size] <= self.ttl
+            if live.any():
+                scores = np.where(live, self._vectors[:self._size] @ vector, -1.0)
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self._last_used[best] = time.monotonic()
+                    SEMANTIC_CACHE_LOOKUPS.labels("hit").inc()
+                    return self._answers[best], vector
+        SEMANTIC_CACHE_LOOKUPS.labels("miss").inc()
+        return None, vector
+
+    async def store(self, question: str, context: str, answer: str, vector: np.ndarray = None):
+        if vector is None:
+            vector = await self._embed(question)
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+        if self._size < self.max_entries:
+            slot = self._size
+            self._size += 1
+        else:
+            # Least recently used slot; expired entries were never touched recently either
+            slot = int(np.argmin(self._last_used))
+            SEMANTIC_CACHE_EVICTIONS.inc()
+
+        self._vectors[slot] = vector
+        self._contexts[slot] = self._context_key(context)
+        self._stored_at[slot] = time.time()
+        self._last_used[slot] = time.monotonic()
+        self._answers[slot] = answer
+        SEMANTIC_CACHE_ENTRIES.set(self._size)
+
+    def __len__(self):
+        return self._size
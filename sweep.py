@@ -0,0 +1,203 @@
+import asyncio
+import math
+import re
+
+import numpy as np
+
+from batching import BATCH_UNSUPPORTED_STATUSES
+from bulk import map_ordered
+from predictor import PACK_FIELDS, PREDICTION_FIELDS, PredictorStatusError
+
+# 🗺️ Design-space sweeps and the power-density / cell-volume Pareto front
+#
+#   /sweep length=800:2000 width=600:1800 height=100:300 energy=60 voltage=400
+#   /sweep length=800:2000:25 width=600:1800:25 height=100:300:8 energy=60 voltage=400
+#   /sweep length=800:2000 width=600:1800 height=100:300 energy=40:80 voltage=400 samples=20000
+#
+# Each field is a fixed value, lo:hi (default steps) or lo:hi:steps. With samples=N the box is
+# Latin-hypercube sampled instead of gridded.
+
+_FIELD_NAMES = {
+    "length": "Length_pack",
+    "width": "Width_pack",
+    "height": "Height_pack",
+    "energy": "Energy",
+    "voltage": "Total_Voltage",
+    **{field.lower(): field for field in PACK_FIELDS},
+}
+_ARGUMENT = re.compile(r"(\w+)\s*=\s*([\d.:]+)")
+
+PD, LENGTH, WIDTH, HEIGHT = (PREDICTION_FIELDS.index(name) for name in
+                             ("Power_density", "Length_cell", "Width_cell", "Height_cell"))
+
+
+class SweepError(ValueError):
+    pass
+
+
+def parse_sweep(text: str, default_steps: int = 10) -> dict:
+    # Returns {"ranges": {field: (lo, hi, steps)}, "samples": N or None}
+    ranges, samples = {}, None
+    for name, value in _ARGUMENT.findall(text):
+        name = name.lower()
+        if name == "samples":
+            try:
+                samples = int(float(value))
+            except ValueError as err:
+                raise SweepError(f"Could not read samples: {value}") from err
+            if samples < 1:
+                raise SweepError("samples must be at least 1")
+            continue
+        field = _FIELD_NAMES.get(name)
+        if field is None:
+            raise SweepError(f"Unknown sweep field '{name}'")
+        try:
+            parts = [float(part) for part in value.split(":")]
+        except ValueError as err:
+            raise SweepError(f"Could not read the range for '{name}': {value}") from err
+        if len(parts) == 1:
+            ranges[field] = (parts[0], parts[0], 1)
+        elif len(parts) in (2, 3):
+            lo, hi = sorted(parts[:2])
+            steps = int(parts[2]) if len(parts) == 3 else default_steps
+            if steps < 1:
+                raise SweepError(f"Steps for '{name}' must be at least 1")
+            ranges[field] = (lo, hi, steps)
+        else:
+            raise SweepError(f"Use value, lo:hi or lo:hi:steps for '{name}'")
+
+    missing = [field for field in PACK_FIELDS if field not in ranges]
+    if missing:
+        raise SweepError(f"Missing sweep field(s): {', '.join(missing)}")
+    return {"ranges": ranges, "samples": samples}
+
+
+def grid(ranges: dict) -> np.ndarray:
+    axes = [np.linspace(lo, hi, max(1, steps) if hi > lo else 1, dtype=np.float32)
+            for lo, hi, steps in (ranges[field] for field in PACK_FIELDS)]
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return np.stack([axis.ravel() for axis in mesh], axis=1)
+
+
+def latin_hypercube(ranges: dict, n: int, seed: int = None) -> np.ndarray:
+    # One sample per stratum on every axis, strata shuffled independently per axis
+    rng = np.random.default_rng(seed)
+    lo = np.array([ranges[field][0] for field in PACK_FIELDS], dtype=np.float64)
+    hi = np.array([ranges[field][1] for field in PACK_FIELDS], dtype=np.float64)
+    strata = rng.permuted(np.tile(np.arange(n), (len(PACK_FIELDS), 1)), axis=1).T
+    unit = (strata + rng.random((n, len(PACK_FIELDS)))) / n
+    return (lo + unit * (hi - lo)).astype(np.float32)
+
+
+def design_points(spec: dict, seed: int = None) -> np.ndarray:
+    if spec["samples"]:
+        return latin_hypercube(spec["ranges"], spec["samples"], seed)
+    return grid(spec["ranges"])
+
+
+def point_count(spec: dict) -> int:
+    if spec["samples"]:
+        return spec["samples"]
+    # Python ints: a product of large step counts must not wrap around like int64 would
+    return math.prod(int(steps) if hi > lo else 1 for lo, hi, steps in spec["ranges"].values())
+
+
+def evaluate_local(model, points: np.ndarray, batch_size: int = 65536) -> np.ndarray:
+    # (n, 5) packs -> (n, 4) predictions through the in-process model, in fixed-size chunks
+    return np.concatenate([model.predict_array(points[i:i + batch_size]) for i in range(0, len(points), batch_size)])
+
+
+async def evaluate_remote(predictor, points: np.ndarray, batch_size: int = 256, concurrency: int = 4) -> np.ndarray:
+    # Batched calls to the predictor API; points it could not predict come back as NaN rows
+    def to_array(results: list) -> np.ndarray:
+        rows = np.full((len(results), len(PREDICTION_FIELDS)), np.nan)
+        for i, result in enumerate(results):
+            predictions = (result or {}).get("predictions") or {}
+            try:
+                rows[i] = [float(predictions[field]) for field in PREDICTION_FIELDS]
+            except (KeyError, TypeError, ValueError):
+                pass
+        return rows
+
+    async def one(inputs: dict):
+        try:
+            return await predictor.predict(inputs)
+        except Exception:
+            return None
+
+    batch_supported = True
+
+    async def chunk(start: int) -> np.ndarray:
+        nonlocal batch_supported
+        packs = [dict(zip(PACK_FIELDS, map(float, row))) for row in points[start:start + batch_size]]
+        if batch_supported:
+            try:
+                return to_array(await predictor.predict_batch(packs))
+            except PredictorStatusError as err:
+                if err.status_code not in BATCH_UNSUPPORTED_STATUSES:
+                    return to_array([None] * len(packs))
+                batch_supported = False
+            except Exception:
+                return to_array([None] * len(packs))
+        return to_array(await asyncio.gather(*(one(pack) for pack in packs)))
+
+    chunks = [result async for result in map_ordered(chunk, range(0, len(points), batch_size), concurrency)]
+    return np.concatenate(chunks) if chunks else np.empty((0, len(PREDICTION_FIELDS)))
+
+
+def cell_volume(predictions: np.ndarray) -> np.ndarray:
+    # mm³ -> litres
+    return predictions[:, LENGTH] * predictions[:, WIDTH] * predictions[:, HEIGHT] / 1e6
+
+
+def pareto_front(volume: np.ndarray, density: np.ndarray) -> np.ndarray:
+    # Indices of points no other point beats on both smaller volume and higher power density,
+    # ordered by volume: one sort plus a running maximum
+    valid = np.flatnonzero(np.isfinite(volume) & np.isfinite(density))
+    if not len(valid):
+        return valid
+    order = valid[np.lexsort((-density[valid], volume[valid]))]
+    best_before = np.maximum.accumulate(np.concatenate(([-np.inf], density[order][:-1])))
+    return order[density[order] > best_before]
+
+
+def front_table(points: np.ndarray, predictions: np.ndarray, front: np.ndarray, limit: int = 15) -> str:
+    # Markdown table of up to `limit` front points spread evenly along the front
+    shown = front if len(front) <= limit else front[np.linspace(0, len(front) - 1, limit).round().astype(int)]
+    lines = [
+        "| Pack L×W×H (mm) | Energy (kWh) | Voltage (V) | Cell L×W×H (mm) | Cell volume (L) | Power density (Wh/kg) |",
+        "|---|---|---|---|---|---|",
+    ]
+    for i in shown:
+        length, width, height, energy, voltage = points[i]
+        cell = predictions[i]
+        lines.append(
+            f"| {length:.0f}×{width:.0f}×{height:.0f} | {energy:.1f} | {voltage:.0f} | "
+            f"{cell[LENGTH]:.0f}×{cell[WIDTH]:.0f}×{cell[HEIGHT]:.0f} | "
+            f"{cell[LENGTH] * cell[WIDTH] * cell[HEIGHT] / 1e6:.3f} | {cell[PD]:.2f} |"
+        )
+    return "\n".join(lines)
+
+
+def write_csv(path: str, points: np.ndarray, predictions: np.ndarray, rows: np.ndarray):
+    header = ",".join((*PACK_FIELDS, *PREDICTION_FIELDS, "Cell_volume_L"))
+    table = np.column_stack([points[rows], predictions[rows], cell_volume(predictions[rows])])
+    np.savetxt(path, table, delimiter=",", header=header, comments="", fmt="%.6g")
+
+
+def front_figure(volume: np.ndarray, density: np.ndarray, front: np.ndarray, max_points: int = 5000):
+    # Plotly scatter of (a sample of) all points with the front on top; None without plotly
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        return None
+    shown = np.arange(len(volume))
+    if len(shown) > max_points:
+        shown = np.random.default_rng(0).choice(shown, max_points, replace=False)
+    figure = go.Figure()
+    figure.add_scattergl(x=volume[shown], y=density[shown], mode="markers", name="designs",
+                         marker={"size": 3, "opacity": 0.3})
+    figure.add_scatter(x=volume[front], y=density[front], mode="lines+markers", name="Pareto front")
+    figure.update_layout(xaxis_title="Cell volume (L)", yaxis_title="Power density (Wh/kg)",
+                         margin={"l": 40, "r": 10, "t": 10, "b": 40})
+    return figure
@@ -0,0 +1,146 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# 🐢 Per-session / per-IP message throttling, checked before any outbound work
+#
+# Each key has a token bucket refilled at `per_minute` and holding up to `burst` messages.
+# State lives in a backend: in-process memory by default, or SQLite / Redis so that several
+# workers share one budget per client.
+
+
+def _refill(level: float, updated: float, now: float, rate: float, capacity: float) -> float:
+    return min(capacity, level + (now - updated) * rate)
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        now = time.time()
+        bucket = self._buckets.get(key)
+        level = capacity if bucket is None else _refill(bucket[0], bucket[1], now, rate, capacity)
+        wait = 0.0 if level >= cost else (cost - level) / rate
+        if not wait:
+            level -= cost
+        self._buckets[key] = (level, now)
+        self._buckets.move_to_end(key)
+        # Least recently seen keys have had the longest to refill, so dropping them is nearly free
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    async def aclose(self):
+        pass
+
+
+class SQLiteBackend:
+    # Shared by workers on one host; each take() is a single short write transaction, run in a worker
+    # thread because waiting on another process's write lock (up to the 5 s timeout) blocks
+    def __init__(self, path: str):
+        self._lock = threading.Lock()  # one connection, so one transaction at a time
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, level REAL, updated REAL)")
+        # Buckets untouched for a day are full again; forget them
+        self._db.execute("DELETE FROM buckets WHERE updated < ?", (time.time() - 86400,))
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        return await asyncio.to_thread(self._take, key, cost, rate, capacity)
+
+    def _take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        with self._lock:
+            now = time.time()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute("SELECT level, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                level = capacity if row is None else _refill(row[0], row[1], now, rate, capacity)
+                wait = 0.0 if level >= cost else (cost - level) / rate
+                if not wait:
+                    level -= cost
+                self._db.execute("INSERT OR REPLACE INTO buckets (key, level, updated) VALUES (?, ?, ?)",
+                                 (key, level, now))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return wait
+
+    async def aclose(self):
+        await asyncio.to_thread(self._db.close)
+
+
+_REDIS_TAKE = """
+local bucket = redis.call('HMGET', KEYS[1], 'level', 'updated')
+local cost, rate, capacity, now = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local level = capacity
+if bucket[1] then
+  level = math.min(capacity, tonumber(bucket[1]) + (now - tonumber(bucket[2])) * rate)
+end
+local wait = 0
+if level >= cost then level = level - cost else wait = (cost - level) / rate end
+redis.call('HSET', KEYS[1], 'level', level, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    # Any server speaking the Redis protocol with Lua scripting (Redis, Valkey, KeyDB, ...)
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio
+        except ImportError as err:
+            raise ImportError("THROTTLE_BACKEND=redis://... needs the 'redis' package") from err
+        self._redis = redis.asyncio.from_url(url)
+        self._take = self._redis.register_script(_REDIS_TAKE)
+
+    async def take(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        return float(await self._take(keys=[f"gotiongpt:throttle:{key}"], args=[cost, rate, capacity, time.time()]))
+
+    async def aclose(self):
+        await self._redis.aclose()
+
+
+def create_backend(spec: str = "memory"):
+    # "memory", "sqlite:/path/to/throttle.db" or "redis://host:6379/0"
+    if not spec or spec == "memory":
+        return MemoryBackend()
+    if spec.startswith("sqlite:"):
+        return SQLiteBackend(spec[len("sqlite:"):])
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(spec)
+    raise ValueError(f"Unknown throttle backend: {spec}")
+
+
+class Throttle:
+    def __init__(self, name: str, per_minute: float, burst: float, backend=None):
+        # per_minute=0 disables the limit
+        self.name = name
+        self.rate = per_minute / 60.0
+        self.capacity = burst
+        self.backend = backend or MemoryBackend()
+
+    async def check(self, key: str, cost: float = 1.0) -> float:
+        # 0 when the message may proceed, otherwise seconds until it would be allowed
+        if not self.rate:
+            return 0.0
+        return await self.backend.take(f"{self.name}:{key}", cost, self.rate, self.capacity)
+
+
+def client_ip(environ: dict, proxy_hops: int = 0):
+    # The client address, or None when there is no trustworthy one (per-IP limits are then skipped).
+    # Behind N trusted proxies the client is the N-th address from the right of X-Forwarded-For;
+    # anything further left was supplied by the client and can be spoofed. Otherwise it is the ASGI
+    # peer: the socket.io environ's REMOTE_ADDR is always a placeholder 127.0.0.1 and would put every
+    # visitor in one bucket.
+    if proxy_hops > 0:
+        forwarded = [part.strip() for part in environ.get("HTTP_X_FORWARDED_FOR", "").split(",") if part.strip()]
+        return forwarded[-proxy_hops] if len(forwarded) >= proxy_hops else None
+    client = (environ.get("asgi.scope") or {}).get("client")
+    return client[0] if client else None
@@ -0,0 +1,119 @@
+import json
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# 🔭 Optional OpenTelemetry tracing
+#
+# configure_tracing("otlp") ships spans to an OTLP/HTTP collector (OTEL_EXPORTER_OTLP_ENDPOINT, default
+# localhost:4318); configure_tracing("file:traces.jsonl") appends one JSON object per span for offline
+# analysis. Without the opentelemetry packages, or unconfigured, every helper here is a no-op.
+
+_tracer = None
+_provider = None
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value):
+        pass
+
+    def set_attributes(self, attributes: dict):
+        pass
+
+    def record_exception(self, exception: BaseException):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _json_lines_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        def __init__(self):
+            self._file = open(path, "a", encoding="utf-8")
+
+        def export(self, spans):
+            for span in spans:
+                context = span.get_span_context()
+                self._file.write(json.dumps({
+                    "name": span.name,
+                    "trace_id": f"{context.trace_id:032x}",
+                    "span_id": f"{context.span_id:016x}",
+                    "parent_id": f"{span.parent.span_id:016x}" if span.parent else None,
+                    "start_ns": span.start_time,
+                    "duration_ms": (span.end_time - span.start_time) / 1e6,
+                    "status": span.status.status_code.name,
+                    "attributes": dict(span.attributes or {}),
+                }, default=str) + "\n")
+            self._file.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            self._file.close()
+
+    return JsonLinesSpanExporter()
+
+
+def configure_tracing(exporter: str = None, service_name: str = "gotiongpt") -> bool:
+    global _tracer, _provider
+    if not exporter:
+        return False
+    if _tracer is not None:
+        return True  # already set up, e.g. after a `chainlit run -w` reload
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    except ImportError:
+        logger.warning("Tracing requested but opentelemetry-sdk is not installed; spans are disabled")
+        return False
+
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter()
+    elif exporter.startswith("file:"):
+        span_exporter = _json_lines_exporter(exporter[len("file:"):])
+    else:
+        raise ValueError(f"Unknown trace exporter: {exporter}")
+
+    _provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    _provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(_provider)
+    _tracer = trace.get_tracer("gotiongpt")
+    return True
+
+
+def shutdown_tracing():
+    # Flushes spans still buffered in the batch processor
+    if _provider is not None:
+        _provider.shutdown()
+
+
+@contextmanager
+def span(name: str, attributes: dict = None):
+    if _tracer is None:
+        yield _NOOP_SPAN
+        return
+    with _tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def current_span():
+    if _tracer is None:
+        return _NOOP_SPAN
+    from opentelemetry import trace
+    return trace.get_current_span()
+
+
+def trace_headers() -> dict:
+    # W3C traceparent/tracestate for the active span, to continue the trace in the predictor API
+    if _tracer is None:
+        return {}
+    from opentelemetry.propagate import inject
+    headers = {}
+    inject(headers)
+    return headers
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from urllib.parse import urljoin
+
+from metrics import (
+    PREDICTOR_COLD_STARTS,
+    PREDICTOR_PING_SECONDS,
+    PREDICTOR_UP,
+    PREDICTOR_WARMUP_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# 🔥 Keeps the Render-hosted predictor awake while people are using the app
+
+class PredictorWarmer:
+    def __init__(self, predictor, health_url: str = None, interval: float = 600.0,
+                 cold_threshold: float = 5.0, timeout: float = 120.0):
+        self.predictor = predictor
+        self.health_url = health_url or urljoin(predictor.url, "/")
+        self.interval = interval
+        self.cold_threshold = cold_threshold
+        self.timeout = timeout
+        self.state = "unknown"  # unknown -> warming -> warm | down
+        self.last_latency = None
+        self.last_ping = 0.0
+        self.active_sessions = 0
+        self._warm = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._task = None
+
+    @property
+    def warming(self) -> bool:
+        return self.state == "warming"
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def session_started(self):
+        self.active_sessions += 1
+        # A new visitor after a lull: start waking the predictor before they type anything
+        if time.monotonic() - self.last_ping >= self.interval:
+            self._wake.set()
+
+    def session_ended(self):
+        self.active_sessions = max(0, self.active_sessions - 1)
+
+    async def wait_until_warm(self, timeout: float) -> bool:
+        if self.state != "warming":
+            return True
+        try:
+            await asyncio.wait_for(self._warm.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def ping(self):
+        self.last_ping = time.monotonic()
+        start = time.perf_counter()
+        request = asyncio.create_task(self.predictor.http.get(self.health_url, timeout=self.timeout))
+        done, _ = await asyncio.wait({request}, timeout=self.cold_threshold)
+        if not done:
+            # Slow enough to be a cold start: let handlers know and wait it out
+            self.state = "warming"
+            self._warm.clear()
+            PREDICTOR_COLD_STARTS.inc()
+            logger.info("Predictor is cold; warming %s", self.health_url)
+
+        try:
+            res = await request
+            # Any answer below 500 means the server is up, even if the health path itself is a 404
+            if res.status_code >= 500:
+                res.raise_for_status()
+        except Exception as err:
+            self.state = "down"
+            PREDICTOR_UP.set(0)
+            logger.warning("Predictor warm-up ping failed: %s", err)
+        else:
+            latency = time.perf_counter() - start
+            if self.state == "warming":
+                PREDICTOR_WARMUP_SECONDS.observe(latency)
+                logger.info("Predictor warm after %.1fs", latency)
+            self.state = "warm"
+            self.last_latency = latency
+            PREDICTOR_UP.set(1)
+            PREDICTOR_PING_SECONDS.observe(latency)
+        finally:
+            if not request.done():
+                request.cancel()
+            self._warm.set()
+
+    async def _run(self):
+        await self.ping()
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self.active_sessions > 0:
+                await self.ping()